@@ -0,0 +1,520 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    Analyses and rewrites of completed models:
+
+    - estimate: Estimates the size of the state space of a model before it is
+      given to UPPAAL. The estimate is a rough one; it is meant to tell apart
+      models verified in seconds from the ones that need hours.
+    - prune: Removes the transitions that can never be taken and the locations
+      that can never be reached, across the templates of a model.
+    - normalize_constants, rescale_constants: Divide the time constants of a
+      model and its queries by their greatest common divisor, and scale them
+      back.
+    - deduplicate_templates, expand_instances: Merge the templates that are the
+      same up to the names of their clocks into one template instantiated for
+      each of them, and expand such a template into a template per instance.
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import re
+import pyuppaal
+
+CLOCK_DECLARATION = re.compile(r"\bclock\s+([^;]*);")
+CONSTRAINT = re.compile(r"\b([A-Za-z_][\w.]*)\s*(<=|>=|==|<|>)\s*(\d+)")
+COMPARISON = re.compile(r"\b([A-Za-z_][\w.]*)(\s*(?:<=|>=|==|<|>)\s*)(\d+)")
+IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+SYSTEM = re.compile(r"\bsystem\s+([^;]*);?")
+INSTANCE = re.compile(r"^\s*(\w+)\s*=\s*(\w+)\s*\(([^)]*)\)\s*;", re.M)
+
+def declared_clocks(declaration):
+    """
+    Returns:
+        List of clock names declared in the given declaration.
+    """
+    clocks = []
+    for d in CLOCK_DECLARATION.findall(declaration or ""):
+        clocks += [c.strip() for c in d.split(",") if c.strip()]
+    return clocks
+
+def update_max_constants(max_constants, text, clocks):
+    """
+    Updates max_constants with the constants compared to the clocks in text.
+    """
+    for (c, op, n) in CONSTRAINT.findall(text or ""):
+        if c not in clocks:
+            c = c.split(".")[-1]
+        if c in clocks:
+            max_constants[c] = max(max_constants.get(c, 0), int(n))
+
+def model_clocks(nta):
+    """
+    Returns:
+        List of the names of the clocks declared in the model and its templates.
+    """
+    clocks = declared_clocks(nta.declaration)
+    for template in nta.templates:
+        clocks += declared_clocks(template.declaration)
+    return clocks
+
+def constraint_labels(nta):
+    """
+    Returns:
+        List of the guard and invariant labels of the model.
+    """
+    labels = []
+    for template in nta.templates:
+        labels += [l.invariant for l in template.locations]
+        labels += [t.guard for t in template.transitions]
+    return labels
+
+def rescale_constants(nta, queries, multiplier, divisor=1):
+    """
+    Multiplies the constants compared to clocks in the guards and invariants of
+    the model and in the queries by multiplier / divisor.
+
+    Args:
+        nta: pyuppaal.NTA, which is modified.
+        queries: Queries of the model.
+        multiplier, divisor: Integers. Every constant must be a multiple of divisor.
+    Returns:
+        Rescaled queries.
+    """
+    clocks = set(model_clocks(nta))
+    def rescale(match):
+        if match.group(1).split(".")[-1] not in clocks:
+            return match.group(0)
+        return match.group(1) + match.group(2) + str(int(match.group(3)) * multiplier // divisor)
+    for label in constraint_labels(nta):
+        if label.value:
+            label.value = COMPARISON.sub(rescale, label.value)
+    return COMPARISON.sub(rescale, queries)
+
+def normalize_constants(nta, queries):
+    """
+    Divides the constants compared to clocks in the model and in the queries by
+    their greatest common divisor. Comparisons of clocks with constants are the
+    only timed expressions of the model, hence this only changes the unit of time.
+
+    Args:
+        nta: pyuppaal.NTA, which is modified.
+        queries: Queries of the model.
+    Returns:
+        Tuple of the divisor and the rescaled queries.
+    """
+    clocks = set(model_clocks(nta))
+    divisor = 0
+    for text in [l.value for l in constraint_labels(nta)] + [queries]:
+        for (c, op, n) in CONSTRAINT.findall(text or ""):
+            if c.split(".")[-1] in clocks:
+                (a, b) = (divisor, int(n))
+                while b:
+                    (a, b) = (b, a % b)
+                divisor = a
+    if divisor <= 1:
+        return (1, queries)
+    return (divisor, rescale_constants(nta, queries, 1, divisor))
+
+def template_labels(template):
+    """
+    Returns:
+        List of the texts of the invariants, guards, and assignments of the template.
+    """
+    return [l.invariant.get_value() for l in template.locations] + \
+        [text for t in template.transitions for text in [t.guard.get_value(), t.assignment.get_value()]]
+
+def instances(nta):
+    """
+    Returns:
+        List of (process name, pyuppaal.Template) pairs of the processes of the
+        system, which are either templates or instances of templates declared
+        as "Process = Template(arguments);".
+    """
+    templates = dict((str(t.name), t) for t in nta.templates)
+    declared = dict((p, templates[t]) for (p, t, a) in INSTANCE.findall(nta.system or "") if t in templates)
+    match = SYSTEM.search(nta.system or "")
+    names = [n.strip() for n in match.group(1).split(",")] if match else sorted(templates.keys())
+    return [(n, declared[n] if n in declared else templates[n]) for n in names if n in declared or n in templates]
+
+def template_structure(template, clocks):
+    """
+    Describes a template up to the names of its clocks, which are numbered in
+    the order they are first used.
+
+    Args:
+        template: pyuppaal.Template.
+        clocks: Names of the clocks the template can use.
+    Returns:
+        Tuple of the description, which templates with the same structure share,
+        and the list of the clocks used by the template in the order they are numbered.
+    """
+    order = []
+    def number(match):
+        if match.group(0) not in clocks:
+            return match.group(0)
+        if match.group(0) not in order:
+            order.append(match.group(0))
+        return "$" + str(order.index(match.group(0)))
+    canonical = lambda text: IDENTIFIER.sub(number, text or "")
+    index = dict((id(l), i) for (i, l) in enumerate(template.locations))
+    locations = tuple((l.name.get_value(), canonical(l.invariant.get_value()), bool(l.committed), bool(l.urgent))
+                      for l in template.locations)
+    transitions = tuple((index[id(t.source)], index[id(t.target)], t.select.get_value(), canonical(t.guard.get_value()),
+                         t.synchronisation.get_value(), canonical(t.assignment.get_value())) for t in template.transitions)
+    declaration = canonical(CLOCK_DECLARATION.sub("", template.declaration or "").strip())
+    return ((index.get(id(template.initlocation)), locations, transitions, declaration), order)
+
+def deduplicate_templates(nta):
+    """
+    Replaces the templates of the model that are the same up to the names of
+    their clocks by one template instantiated once for each of them, keeping the
+    model equivalent. Processes keep the names of the templates they replace.
+    Global clocks that the templates share stay global, and the clocks in which
+    they differ, which each of them must use alone, become local to the
+    template, hence every process keeps clocks of its own. Templates whose
+    clocks are shared otherwise are not merged. Global clocks that no other
+    template uses anymore are removed.
+
+    Args:
+        nta: pyuppaal.NTA of the completed model, which is modified.
+    Returns:
+        Dictionary. [process name : [clock : local clock]] of the processes of
+        the merged templates.
+    """
+    global_clocks = declared_clocks(nta.declaration)
+    processes = [p for (p, t) in instances(nta)]
+    users = {}
+    for t in nta.templates:
+        for c in set(IDENTIFIER.findall(" ".join(template_labels(t)))) & set(global_clocks):
+            users[c] = users.get(c, set()) | set([str(t.name)])
+    groups = {}
+    forms = []
+    for t in nta.templates:
+        if t.parameter or str(t.name) not in processes:
+            continue
+        (form, order) = template_structure(t, set(global_clocks + declared_clocks(t.declaration)))
+        if form not in groups:
+            groups[form] = []
+            forms.append(form)
+        groups[form].append((t, order))
+    taken = set(processes + [str(t.name) for t in nta.templates] + IDENTIFIER.findall(nta.declaration or ""))
+    local_clocks = {}
+    merged = set()
+    instance_declarations = []
+    for form in forms:
+        members = groups[form]
+        if len(members) < 2:
+            continue
+        names = [str(t.name) for (t, order) in members]
+        own = lambda t, c: c in declared_clocks(t.declaration) or users.get(c) == set([str(t.name)])
+        shared = lambda c: c in global_clocks and not [t for (t, order) in members if c in declared_clocks(t.declaration)]
+        positions = []
+        mergeable = True
+        for k in range(len(members[0][1])):
+            column = [order[k] for (t, order) in members]
+            if len(set(column)) == 1 and shared(column[0]):
+                continue
+            if [i for (i, (t, order)) in enumerate(members) if not own(t, column[i])]:
+                mergeable = False
+                break
+            positions.append(k)
+        if not mergeable:
+            continue
+        name = os.path.commonprefix(names).rstrip("_0123456789")
+        if not name or name in taken:
+            name = names[0] + "Template"
+        suffix = 1
+        while name + (str(suffix) if suffix > 1 else "") in taken:
+            suffix += 1
+        name += str(suffix) if suffix > 1 else ""
+        taken.add(name)
+        merged.add(name)
+        (template, order) = members[0]
+        local = [order[k] for k in positions]
+        template.name = pyuppaal.Label("name", name)
+        declaration = CLOCK_DECLARATION.sub("", template.declaration or "").strip()
+        template.declaration = ("clock " + ", ".join(local) + ";\n" if local else "") + (declaration + "\n" if declaration else "")
+        for (i, (t, order)) in enumerate(members):
+            local_clocks[names[i]] = dict(zip([order[k] for k in positions], local))
+            instance_declarations.append(names[i] + " = " + name + "();")
+            if t is not template:
+                nta.templates.remove(t)
+    if not merged:
+        return local_clocks
+    used = set()
+    for t in nta.templates:
+        if str(t.name) not in merged:
+            used.update(IDENTIFIER.findall(" ".join(template_labels(t))))
+    localized = set([c for m in local_clocks.values() for c in m.keys()]) - used
+    def remove_clocks(match):
+        kept = [c.strip() for c in match.group(1).split(",") if c.strip() and c.strip() not in localized]
+        return "clock " + ", ".join(kept) + ";" if kept else ""
+    nta.declaration = re.sub(r"(?m)^\s*\n", "", CLOCK_DECLARATION.sub(remove_clocks, nta.declaration or ""))
+    prefix = SYSTEM.split(nta.system or "")[0].strip() if SYSTEM.search(nta.system or "") else ""
+    nta.system = "\n".join(([prefix] if prefix else []) + instance_declarations + ["system " + ", ".join(processes)])
+    return local_clocks
+
+def expand_instances(nta):
+    """
+    Replaces the instantiated templates of the model by a copy for each of their
+    instances, named after the instance, with the arguments substituted for the
+    parameters if any, so that the templates of a model generated with deduplicated
+    templates can be replaced one by one again.
+
+    Args:
+        nta: pyuppaal.NTA, which is modified.
+    """
+    if not INSTANCE.search(nta.system or ""):
+        return
+    arguments = dict((p, [a.strip() for a in arguments.split(",") if a.strip()])
+                     for (p, t, arguments) in INSTANCE.findall(nta.system))
+    processes = instances(nta)
+    templates = []
+    for (p, t) in processes:
+        if str(t.name) == p and not t.parameter:
+            templates.append(t)
+            continue
+        t = copy.deepcopy(t)
+        parameters = [d.split()[-1].lstrip("&") for d in (t.parameter or "").split(",") if d.strip()]
+        values = dict(zip(parameters, arguments.get(p, [])))
+        substitute = lambda text: IDENTIFIER.sub(lambda m: values.get(m.group(0), m.group(0)), text or "")
+        for l in t.locations:
+            l.invariant.value = substitute(l.invariant.get_value()) or l.invariant.value
+        for e in t.transitions:
+            for label in [e.guard, e.synchronisation, e.assignment]:
+                label.value = substitute(label.get_value()) or label.value
+        t.declaration = substitute(t.declaration) or t.declaration
+        (t.name, t.parameter) = (p, "")
+        templates.append(t)
+    nta.templates = templates
+    nta.system = "system " + ", ".join([p for (p, t) in processes]) + ";"
+
+def template_report(template, clocks):
+    """
+    Describes a template.
+
+    Args:
+        template: pyuppaal.Template.
+        clocks: Names of the clocks the template can use.
+    Returns:
+        Dictionary.
+    """
+    max_constants = {}
+    resets = set()
+    sends = {}
+    receives = {}
+    for l in template.locations:
+        update_max_constants(max_constants, l.invariant.get_value(), clocks)
+    for t in template.transitions:
+        update_max_constants(max_constants, t.guard.get_value(), clocks)
+        for c in re.findall(r"\b(\w+)\s*=(?!=)", t.assignment.get_value() or ""):
+            if c in clocks:
+                resets.add(c)
+        synch = (t.synchronisation.get_value() or "").strip()
+        if synch.endswith("!"):
+            sends[synch[:-1]] = sends.get(synch[:-1], 0) + 1
+        elif synch.endswith("?"):
+            receives[synch[:-1]] = receives.get(synch[:-1], 0) + 1
+    return {
+        "name": str(template.name),
+        "locations": len(template.locations),
+        "committed_locations": len([l for l in template.locations if l.committed]),
+        "edges": len(template.transitions),
+        "clocks": sorted(set(max_constants.keys()) | resets),
+        "max_constants": max_constants,
+        "sends": sends,
+        "receives": receives
+    }
+
+def region_bound(max_constants):
+    """
+    Returns:
+        log10 of the number of clock regions of clocks with the given maximal
+        constants, i.e., n! * 2^n * product of (2 * M + 2).
+    """
+    n = len(max_constants)
+    return (math.lgamma(n + 1) + n * math.log(2)) / math.log(10) + \
+        sum([math.log10(2 * m + 2) for m in max_constants.values()])
+
+def estimate(nta, queries=""):
+    """
+    Estimates the size of the state space of a model.
+
+    Args:
+        nta: pyuppaal.NTA of the completed model.
+        queries: Queries of the model, whose constants are compared to clocks as well.
+    Returns:
+        Dictionary with the reports of the processes and channels and the estimates.
+        The clocks declared by a template are counted for each of its processes.
+        The number of symbolic states is estimated as the number of discrete states
+        times the product of M + 2 over the clocks, M being the largest constant
+        compared to the clock. The number of clock regions bounds it from above.
+    """
+    global_clocks = declared_clocks(nta.declaration)
+    clocks = list(global_clocks)
+    templates = []
+    for (name, template) in instances(nta):
+        local = declared_clocks(template.declaration)
+        report = template_report(template, global_clocks + local)
+        qualify = lambda c: name + "." + c if c in local else c
+        report["name"] = name
+        report["clocks"] = sorted([qualify(c) for c in report["clocks"]])
+        report["max_constants"] = dict((qualify(c), m) for (c, m) in report["max_constants"].items())
+        templates.append(report)
+        clocks += [name + "." + c for c in local]
+    max_constants = dict((c, 0) for c in clocks)
+    for t in templates:
+        for c in t["max_constants"].keys():
+            max_constants[c] = max(max_constants[c], t["max_constants"][c])
+    update_max_constants(max_constants, queries, clocks)
+    channels = {}
+    for t in templates:
+        for (key, synchs) in [("fan_out", t["sends"]), ("fan_in", t["receives"])]:
+            for (a, n) in synchs.items():
+                channels.setdefault(a, {"fan_out": 0, "fan_in": 0})[key] += n
+    discrete = sum([math.log10(max(t["locations"], 1)) for t in templates])
+    zones = sum([math.log10(m + 2) for m in max_constants.values()])
+    size = discrete + zones
+    return {
+        "templates": templates,
+        "channels": channels,
+        "clocks": len(clocks),
+        "max_constants": max_constants,
+        "dbm_entries": (len(clocks) + 1) ** 2,
+        "log10_discrete_states": discrete,
+        "log10_regions": discrete + region_bound(max_constants),
+        "log10_states": size,
+        "class": "small" if size < 6 else "medium" if size < 9 else "large"
+    }
+
+def prune(templates, other_templates=(), queries=""):
+    """
+    Removes the transitions of the templates that can never be taken and the
+    locations that can never be reached before the templates are completed.
+    A transition receiving on a channel can be taken only if another template
+    can send on it, and vice versa; a transition can be taken only if its source
+    location can be reached, which in turn depends on the transitions that can
+    be taken. Hence both are computed together until nothing changes. The
+    locations referred by the queries are never removed.
+
+    Args:
+        templates: Dictionary of objects.Template by name, which are not completed yet.
+        other_templates: pyuppaal.Templates of the model that are kept as they are.
+        queries: Queries of the model.
+    Returns:
+        Dictionary of (removed locations, removed transitions, removed clocks) by template
+        name, where a transition is a (source, target, synchronisation) triple.
+    """
+    protected = set(re.findall(r"\b(\w+)\.(\w+)\b", queries))
+    partners = {}
+    for template in other_templates:
+        for t in template.transitions:
+            synch = (t.synchronisation.get_value() or "").strip()
+            if synch:
+                partners.setdefault(synch, set()).add(str(template.name))
+    synchs = dict((name, dict((t[2], templates[name].get_synchronisation(t[2]).strip()) for t in templates[name].get_transitions()))
+                  for name in templates.keys())
+    dead = dict((name, set()) for name in templates.keys())
+    while True:
+        reachable = {}
+        live = dict((synch, set(names)) for (synch, names) in partners.items())
+        for name in templates.keys():
+            reachable[name] = set(["LOCATION_ZERO"])
+            stack = ["LOCATION_ZERO"]
+            while stack:
+                for t in templates[name].ta.out_edges(stack.pop()):
+                    if t[2] not in dead[name] and t[1] not in reachable[name]:
+                        reachable[name].add(t[1])
+                        stack.append(t[1])
+            for t in templates[name].get_transitions():
+                if t[0] in reachable[name] and t[2] not in dead[name] and synchs[name][t[2]]:
+                    live.setdefault(synchs[name][t[2]], set()).add(name)
+        changed = False
+        for name in templates.keys():
+            for t in templates[name].get_transitions():
+                synch = synchs[name][t[2]]
+                if t[0] not in reachable[name] or t[2] in dead[name] or not synch:
+                    continue
+                partner = synch[:-1] + ("?" if synch.endswith("!") else "!")
+                if not live.get(partner, set()) - set([name]):
+                    dead[name].add(t[2])
+                    changed = True
+        if not changed:
+            break
+    removed = {}
+    for name in sorted(templates.keys()):
+        template = templates[name]
+        locations = set(l for l in template.locations if l not in reachable[name] and (name, l) not in protected)
+        transitions = [t for t in template.get_transitions() if t[2] in dead[name] or t[0] not in reachable[name]]
+        if not locations and not transitions:
+            continue
+        described = [(t[0], t[1], synchs[name][t[2]]) for t in transitions]
+        clocks = template.remove(locations, set(t[2] for t in transitions))
+        removed[name] = (sorted(locations), described, clocks)
+    return removed
+
+def format_prune_report(removed):
+    """
+    Returns:
+        List of lines describing what prune removed.
+    """
+    lines = []
+    for name in sorted(removed.keys()):
+        (locations, transitions, clocks) = removed[name]
+        if locations:
+            lines.append(name + ": removed unreachable locations " + ", ".join(locations))
+        for t in transitions:
+            lines.append(name + ": removed transition " + t[0] + " -> " + t[1] + (" (" + t[2] + ")" if t[2] else ""))
+        if clocks:
+            lines.append(name + ": removed clocks " + ", ".join(clocks))
+    return lines
+
+def format_report(report):
+    """
+    Returns:
+        The report returned by estimate as text.
+    """
+    lines = ["%-16s %9s %9s %6s %6s  %s" % ("template", "locations", "committed", "edges", "clocks", "max constants")]
+    for t in report["templates"]:
+        lines.append("%-16s %9d %9d %6d %6d  %s" % (t["name"], t["locations"], t["committed_locations"], t["edges"], len(t["clocks"]),
+                     " ".join([c + ":" + str(t["max_constants"][c]) for c in sorted(t["max_constants"].keys())])))
+    if report["channels"]:
+        lines.append("")
+        lines.append("%-16s %9s %9s" % ("channel", "fan-out", "fan-in"))
+        for a in sorted(report["channels"].keys()):
+            lines.append("%-16s %9d %9d" % (a, report["channels"][a]["fan_out"], report["channels"][a]["fan_in"]))
+    lines.append("")
+    lines.append("clocks:                 %d (DBM of %d entries)" % (report["clocks"], report["dbm_entries"]))
+    lines.append("discrete states:        10^%.1f" % report["log10_discrete_states"])
+    lines.append("clock regions (bound):  10^%.1f" % report["log10_regions"])
+    lines.append("symbolic states:        10^%.1f (%s)" % (report["log10_states"], report["class"]))
+    return "\n".join(lines)
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Estimates the state space of a UPPAAL model")
+    argument_parser.add_argument("model", help="model file")
+    argument_parser.add_argument("queries", nargs="?", help="query file")
+    argument_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = argument_parser.parse_args()
+    f = open(args.model)
+    nta = pyuppaal.NTA.from_xml(f)
+    f.close()
+    queries = ""
+    if args.queries:
+        f = open(args.queries)
+        queries = f.read()
+        f.close()
+    report = estimate(nta, queries)
+    if args.json:
+        print(json.dumps(report, indent=1, sort_keys=True))
+    else:
+        print(format_report(report))
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,69 @@
     by the METU Cyber-Physical Systems Research Group.
 """
 
-from lark import Lark
 from re import sub
-import objects as objs
+import argparse
+import json
+import os
+import sys
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+class EmptyModelError(Exception):
+    """
+    Raised when no template is constructed from the given sentences.
+    """
+    def __init__(self, messages):
+        """
+        Args:
+            messages: List of the error messages of the lines that could not be parsed.
+        """
+        Exception.__init__(self, "no template could be constructed from the sentences")
+        self.messages = messages
+
+class TemplateTable(dict):
+    """
+    Dictionary of TA templates by name. When a model is extended, templates of the
+    model are restored from their stored descriptions the first time they are used.
+    """
+    def __init__(self, stored=None):
+        """
+        Args:
+            stored: Dictionary. [template name : Template.to_dict() of the template].
+        """
+        dict.__init__(self)
+        self.stored = stored if stored else {}
+
+    def __missing__(self, template_name):
+        if template_name not in self.stored:
+            raise KeyError(template_name)
+        import objects as objs
+        self[template_name] = objs.Template.from_dict(self.stored[template_name])
+        return self[template_name]
 
 """
 Internal global variables.
 """
-_TAs = {}
+_TAs = TemplateTable()
 _output_file_name = ""
 _queries = ""
+_query_refs = []
+_clock_mappings = {}
+_local_clocks = {}
+_reduce_spec_clocks = False
+_prune = False
+_normalize_constants = False
+_deduplicate_templates = False
+_emit_ir = False
+_layout = True
+_reuse_layouts = True
+_jobs = 1
+_budget = None
+_pruned = {}
+_parser = None
 
 Grammar = """
     start        : init | tran | invrt | spec
@@ -63,21 +116,172 @@ Grammar = """
     %import common.NUMBER
 """
 
-parser = Lark(Grammar, parser='earley')
+def get_parser():
+    """
+    Returns the parser of the grammar. Lark is imported and the parser is built
+    the first time a line is parsed, so that ATAC starts without waiting for them.
+    """
+    global _parser
+    if _parser is None:
+        from lark import Lark
+        _parser = Lark(Grammar, parser='earley')
+    return _parser
 
-def complete_templates():
+def complete_model():
     """
     Completes the current TA model.
+
+    Returns:
+        Tuple of the model in xml format, the queries, and the sidecar
+        dictionary from which the model can be extended. If the time constants
+        are normalized, the sidecar has the divisor of the constants as scale.
+        If templates are deduplicated, the sidecar has the local clocks of the
+        processes of the merged templates. Templates whose structure is the same
+        as in the output file, if it exists, keep their layout in it instead of
+        being laid out again.
     """
-    global _TAs
-    clock_mappings = {}
+    global _pruned, _local_clocks
+    import analysis
+    import objects as objs
+    stored = dict(_TAs.stored)
     for ta in _TAs.keys():
-        clock_mappings.update(_TAs[ta].complete_template())
-    objs.write_to_xml(_output_file_name + ".xml")
-    if _queries:
+        stored[ta] = _TAs[ta].to_dict()
+    if _prune:
+        _pruned = analysis.prune(_TAs, objs.get_nta().templates, _queries)
+    _clock_mappings.update(objs.complete_templates(_TAs, _reduce_spec_clocks, _jobs, _budget))
+    _local_clocks = dict((p, m) for (p, m) in _local_clocks.items() if p not in _TAs.keys())
+    if _deduplicate_templates:
+        for (p, renaming) in analysis.deduplicate_templates(objs.get_nta()).items():
+            previous = _local_clocks.get(p, dict((c, c) for c in renaming.keys()))
+            _local_clocks[p] = dict((c, renaming.get(x, x)) for (c, x) in previous.items())
+    queries = rewrite_queries()
+    scale = 1
+    if _normalize_constants:
+        (scale, queries) = analysis.normalize_constants(objs.get_nta(), queries)
+        if scale != 1 and queries:
+            queries = "//Time constants are divided by " + str(scale) + "\n" + queries
+    sidecar = {"version": 1, "templates": stored, "queries": _queries,
+               "query_refs": _query_refs, "clock_mappings": _clock_mappings, "local_clocks": _local_clocks,
+               "scale": scale}
+    layouts = None
+    if _layout and _reuse_layouts and _output_file_name and os.path.exists(_output_file_name + ".xml"):
+        layouts = objs.read_layouts(_output_file_name + ".xml")
+    return (objs.to_xml(_layout, layouts), queries, sidecar)
+
+def rewrite_queries():
+    """
+    Renames the clocks read by the queries according to the clock mappings of
+    their templates, i.e., to the clocks that replaced them during completion.
+    Clocks that became local to a process of a deduplicated template are
+    qualified by the name of the process.
+
+    Returns:
+        Queries.
+    """
+    lines = _queries.split("\n")
+    for (i, refs) in enumerate(_query_refs):
+        renaming = {}
+        for (template_name, c) in refs:
+            mapping = _clock_mappings.get(template_name, {})
+            local = _local_clocks.get(template_name, {})
+            x = mapping[c][0] if c in mapping else c
+            if x in local:
+                x = template_name + "." + local[x]
+            if x != c and c not in renaming:
+                renaming[c] = x
+        if renaming:
+            lines[i] = sub(r"\b(" + "|".join(renaming.keys()) + r")\b", lambda m: renaming[m.group(1)], lines[i])
+    return "\n".join(lines)
+
+def budget_report():
+    """
+    Returns:
+        List of lines naming the templates whose clock reduction exceeded its budget.
+    """
+    return ["Clock reduction of " + ta + " exceeded its budget (" + _TAs[ta].budget_exceeded +
+            "), its clocks are reduced only partially" for ta in sorted(_TAs.keys()) if _TAs[ta].budget_exceeded]
+
+def add_query(query, refs=()):
+    """
+    Adds a query.
+
+    Args:
+        query: Query.
+        refs: List of (template name, clock) pairs of the clocks read by the query.
+    """
+    global _queries
+    _queries += query + "\n"
+    _query_refs.append(list(refs))
+
+def complete_templates():
+    """
+    Completes the current TA model and writes it to the output files.
+
+    Returns:
+        Queries.
+    """
+    import analysis
+    (xml, queries, sidecar) = complete_model()
+    if sidecar["scale"] != 1:
+        print("Time constants are divided by " + str(sidecar["scale"]))
+    for line in analysis.format_prune_report(_pruned) + budget_report():
+        print(line)
+    shared_spec_clock_count = sum([_TAs[ta].shared_spec_clock_count for ta in _TAs.keys()])
+    if shared_spec_clock_count:
+        print("Specification clocks saved by sharing them between queries: " + str(shared_spec_clock_count))
+    folded_spec_clock_count = sum([_TAs[ta].folded_spec_clock_count for ta in _TAs.keys()])
+    if folded_spec_clock_count:
+        print("Specification clocks replaced by clocks of the model: " + str(folded_spec_clock_count))
+    f = open(_output_file_name + ".xml", "w")
+    f.write(xml)
+    f.close()
+    if queries:
         f = open(_output_file_name + ".q", "w+")
-        f.write(_queries)
+        f.write(queries)
         f.close()
+    f = open(_output_file_name + ".atac.json", "w")
+    json.dump(sidecar, f)
+    f.close()
+    if _emit_ir:
+        import ir
+        import objects as objs
+        f = open(_output_file_name + ".atac.ir", "wb")
+        ir.dump(f, objs.get_nta(), queries, _clock_mappings, _local_clocks, sidecar["scale"])
+        f.close()
+    return queries
+
+def load_model(name):
+    """
+    Loads a model generated by ATAC so that new sentences extend it. Templates of
+    the model are restored from the sidecar file written along with the model only
+    if a new sentence refers to them, and only those templates are completed again.
+
+    Args:
+        name: Name of the model, i.e., the output file name used to generate it.
+    """
+    global _TAs, _output_file_name, _queries, _query_refs, _clock_mappings, _local_clocks
+    import analysis
+    import objects as objs
+    f = open(name + ".atac.json")
+    sidecar = json.load(f)
+    f.close()
+    objs.read_from_xml(name + ".xml")
+    if sidecar.get("scale", 1) != 1:
+        analysis.rescale_constants(objs.get_nta(), "", sidecar["scale"])
+    _TAs = TemplateTable(sidecar["templates"])
+    if "queries" in sidecar:
+        _queries = str(sidecar["queries"])
+        _query_refs = [[(str(t), str(c)) for (t, c) in refs] for refs in sidecar["query_refs"]]
+        _clock_mappings = dict((str(t), dict((str(c), [str(x) for x in m]) for (c, m) in mapping.items()))
+                               for (t, mapping) in sidecar["clock_mappings"].items())
+        _local_clocks = dict((str(p), dict((str(c), str(x)) for (c, x) in local.items()))
+                             for (p, local) in sidecar.get("local_clocks", {}).items())
+    elif os.path.exists(name + ".q"):
+        f = open(name + ".q")
+        _queries = f.read()
+        f.close()
+        _query_refs = [[] for i in range(_queries.count("\n"))]
+    _output_file_name = name
 
 def extract_locations(t):
     """
@@ -158,12 +362,14 @@ def extract_path_frml(t):
     elif t.data == "might_eventually":
         return "E<>"
 
-def extract_state_frml(t):
+def extract_state_frml(t, refs):
     """
     Extracts state formula.
 
     Args:
         t: A tree with state formula.
+        refs: List to which the (template name, clock) pairs of the clocks read
+              by the state formula are appended.
     Returns:
         state formula
     """
@@ -173,6 +379,7 @@ def extract_state_frml(t):
         if t.children[1].data == "time_spec":
             is_entering, lk, cond = extract_time_condition(t.children[1])
             c = _TAs[template_name].create_clock(guard_info=(), invariant_info=(), assignment_info=[("", lk)] if is_entering else [(lk, "")], is_spec_clock=True)
+            refs.append((template_name, c))
             query += c + cond
         elif t.children[1].data == "loc_spec":
             ls = extract_locations(t.children[1].children[0])
@@ -198,7 +405,7 @@ def run_instruction(t):
     Args:
         t: Parse tree of a line.
     """
-    global _TAs, _current_template_name, _queries
+    import objects as objs
     if t.data == "single_loc_init":
         template_name = t.children[0].value.capitalize()
         initial_location = t.children[1].value.capitalize()
@@ -290,21 +497,23 @@ def run_instruction(t):
         for l in ls:
             _TAs[template_name].create_clock(guard_info=(), invariant_info=([l], cond), assignment_info=[("", l)])
     elif t.data == "general_spec":
+        refs = []
         path_frml = extract_path_frml(t.children[0])
-        state_frml = extract_state_frml(t.children[1])
-        _queries += path_frml + " " + state_frml + "\n"
+        state_frml = extract_state_frml(t.children[1], refs)
+        add_query(path_frml + " " + state_frml, refs)
     elif t.data == "al_not_deadlock":
-        _queries += "A[] not deadlock\n"
+        add_query("A[] not deadlock")
     elif t.data == "leads_to":
-        state_frml1 = extract_state_frml(t.children[0])
-        state_frml2 = extract_state_frml(t.children[1])
-        _queries += state_frml1 + " --> " + state_frml2 + "\n"
+        refs = []
+        state_frml1 = extract_state_frml(t.children[0], refs)
+        state_frml2 = extract_state_frml(t.children[1], refs)
+        add_query(state_frml1 + " --> " + state_frml2, refs)
     elif t.data == "special_spec1":
         template_name = t.children[0].value.capitalize()
         l = t.children[1].value.capitalize()
         n = t.children[2].value
         c = _TAs[template_name].create_clock(guard_info=(), invariant_info=(), assignment_info=[(l, "")], is_spec_clock=True)
-        _queries += "A[] not " + template_name + "." + l + " or " + c + " <= " + n + "\n"
+        add_query("A[] not " + template_name + "." + l + " or " + c + " <= " + n, [(template_name, c)])
 
 def run_line(line):
     """
@@ -313,37 +522,173 @@ def run_line(line):
     Args:
         line: An input line.
     """
-    parse_tree = parser.parse(line)
+    parse_tree = get_parser().parse(line)
     for inst in parse_tree.children:
         run_instruction(inst)
 
+def normalize_line(line):
+    """
+    Removes punctuation and extra spaces from an input line and lowercases it.
+
+    Args:
+        line: An input line.
+    """
+    return sub(' +', ' ', sub(r'([^\s\w]|_)+', '', line)).strip().lower()
+
+def compile_sentences(sentences, reduce_spec_clocks=False, prune=False, normalize_constants=False, layout=True,
+                      budget=None, deduplicate_templates=False):
+    """
+    Constructs the TA model of the given sentences. The model is built in the
+    globals of this module, hence this function can be called once per process.
+
+    Args:
+        sentences: List of input lines.
+        reduce_spec_clocks: Whether specification clocks are replaced by clocks of the model.
+        prune: Whether transitions that can never be taken and unreachable locations are removed.
+        normalize_constants: Whether time constants are divided by their greatest common divisor.
+        layout: Whether the templates are laid out with Graphviz.
+        budget: objects.Budget of the clock reduction of each template, or None.
+        deduplicate_templates: Whether templates that are the same up to the names of their
+                               clocks are replaced by one template instantiated for each of them.
+    Returns:
+        Tuple of the model in xml format, the queries, and the list of error
+        messages of the lines that could not be parsed followed by the report
+        of the removed transitions and locations and of the templates that
+        exceeded the budget.
+    Raises:
+        EmptyModelError: If no template is constructed from the sentences.
+    """
+    global _reduce_spec_clocks, _prune, _normalize_constants, _layout, _budget, _deduplicate_templates
+    import analysis
+    _reduce_spec_clocks = reduce_spec_clocks
+    _prune = prune
+    _normalize_constants = normalize_constants
+    _layout = layout
+    _budget = budget
+    _deduplicate_templates = deduplicate_templates
+    messages = []
+    for line in sentences:
+        line = normalize_line(line)
+        if not line:
+            continue
+        try:
+            run_line(line)
+        except Exception as e:
+            messages.append(str(e))
+    import objects as objs
+    if objs.get_nta() is None:
+        raise EmptyModelError(messages)
+    (xml, queries, sidecar) = complete_model()
+    messages += analysis.format_prune_report(_pruned) + budget_report()
+    if sidecar["scale"] != 1:
+        messages.append("Time constants are divided by " + str(sidecar["scale"]))
+    return (xml, queries, messages)
+
 def get_lines():
     """
     Starts parsing procedure, reads each line from stdin, and call run_line for each one.
+    The messages of the lines that cannot be used are written to stderr.
     """
     while True:
-        line = raw_input()
-        line = sub(' +', ' ', sub(r'([^\s\w]|_)+', '', line)).strip().lower()
+        line = normalize_line(input())
         if not line:
             break
         try:
             run_line(line)
         except Exception as e:
-            print e
+            sys.stderr.write(str(e) + "\n")
 
 def init_screen():
     """
     Initializes stdout for the file name and user input.
     """
     global _output_file_name
-    print "#################################################################"
-    print "########## ATAC: Automated Timed Automata Construction ##########"
-    print "#################################################################"
-    print "Enter output file name: "
-    _output_file_name = raw_input()
-    print "Below, you can start entering descriptions and specifications:"
-
-init_screen()
-get_lines()
-complete_templates()
+    print("#################################################################")
+    print("########## ATAC: Automated Timed Automata Construction ##########")
+    print("#################################################################")
+    if _output_file_name:
+        print("Extending " + _output_file_name + ".xml")
+    else:
+        print("Enter output file name: ")
+        _output_file_name = input()
+    print("Below, you can start entering descriptions and specifications:")
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+    """
+    argument_parser = argparse.ArgumentParser(description="ATAC: Automated Timed Automata Construction")
+    argument_parser.add_argument("--extend", metavar="NAME",
+                                 help="add sentences to the model NAME.xml generated by ATAC, "
+                                      "completing again only the templates they refer to")
+    argument_parser.add_argument("--estimate", action="store_true",
+                                 help="print an estimate of the state space of the model")
+    argument_parser.add_argument("--simulate", metavar="RUNS", type=int,
+                                 help="simulate RUNS random runs of the model, reporting deadlocks and "
+                                      "the locations and transitions never visited")
+    argument_parser.add_argument("--prune", action="store_true",
+                                 help="remove transitions that can never be taken and locations that "
+                                      "can never be reached, reporting what is removed")
+    argument_parser.add_argument("--normalize-constants", action="store_true",
+                                 help="divide the time constants of the model and the queries by their "
+                                      "greatest common divisor, reporting the divisor")
+    argument_parser.add_argument("--reduce-spec-clocks", action="store_true",
+                                 help="replace the clocks read by the queries with clocks of the model "
+                                      "that are reset on the same transitions")
+    argument_parser.add_argument("--deduplicate-templates", action="store_true",
+                                 help="replace templates that are the same up to the names of their clocks "
+                                      "by one template instantiated for each of them; clocks the templates "
+                                      "share stay global, clocks each uses alone become local, and templates "
+                                      "sharing clocks otherwise are kept")
+    argument_parser.add_argument("--emit-ir", action="store_true",
+                                 help="also write the model, the queries, and the clock mappings to NAME.atac.ir "
+                                      "in a compact binary format that loads faster than the xml")
+    argument_parser.add_argument("--jobs", metavar="N", type=int, default=1,
+                                 help="reduce the clocks of up to N templates at once in worker processes "
+                                      "(default: 1)")
+    argument_parser.add_argument("--budget-seconds", metavar="SECONDS", type=float,
+                                 help="stop reducing the clocks of a template after SECONDS, keeping "
+                                      "the clocks reduced so far")
+    argument_parser.add_argument("--budget-paths", metavar="N", type=int,
+                                 help="stop reducing the clocks of a template after enumerating N paths, "
+                                      "keeping the clocks reduced so far")
+    argument_parser.add_argument("--no-layout", action="store_true",
+                                 help="do not lay out the templates with Graphviz, leaving every location "
+                                      "at the origin; pygraphviz is not needed then")
+    argument_parser.add_argument("--relayout", action="store_true",
+                                 help="lay out every template again, including the ones whose structure "
+                                      "is unchanged in the existing output file")
+    return argument_parser.parse_args()
+
+def main():
+    global _reduce_spec_clocks, _prune, _normalize_constants, _deduplicate_templates, _emit_ir, _layout, _reuse_layouts, \
+        _jobs, _budget
+    args = parse_arguments()
+    _reduce_spec_clocks = args.reduce_spec_clocks
+    _prune = args.prune
+    _normalize_constants = args.normalize_constants
+    _deduplicate_templates = args.deduplicate_templates
+    _emit_ir = args.emit_ir
+    _layout = not args.no_layout
+    _reuse_layouts = not args.relayout
+    _jobs = args.jobs
+    if args.budget_seconds is not None or args.budget_paths is not None:
+        import objects as objs
+        _budget = objs.Budget(args.budget_seconds, args.budget_paths)
+    if args.extend:
+        load_model(args.extend)
+    init_screen()
+    get_lines()
+    queries = complete_templates()
+    if args.estimate:
+        import analysis
+        import objects as objs
+        print(analysis.format_report(analysis.estimate(objs.get_nta(), queries)))
+    if args.simulate:
+        import objects as objs
+        import simulator
+        print(simulator.format_report(simulator.simulate(objs.get_nta(), args.simulate)))
+
+if __name__ == "__main__":
+    main()
 
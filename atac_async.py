@@ -0,0 +1,143 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    Asyncio interface of ATAC for Python 3.
+
+    ATAC keeps the model being constructed in module globals and reads its input
+    from stdin, so every model is compiled by its own ATAC process. Both ATAC and
+    verifyta run as asyncio subprocesses, hence any number of models can be
+    compiled and verified concurrently from one event loop:
+
+        results = await asyncio.gather(*[compile_and_verify(s, d) for (s, d) in jobs])
+"""
+
+import asyncio
+import collections
+import os
+import re
+import shlex
+import signal
+import sys
+
+import pyuppaal
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "atac.py")
+
+Model = collections.namedtuple("Model", ["model_file_name", "query_file_name", "messages"])
+
+
+class CompileError(Exception):
+    """
+    Raised when the ATAC process fails.
+    """
+    pass
+
+
+async def compile_model(sentences, directory, name="model", interpreter=sys.executable, atac=ATAC, extend=False,
+                        atac_args=()):
+    """
+    Constructs a TA model from sentences with an ATAC process.
+
+    Args:
+        sentences: List of sentences, in the order they would be entered to ATAC.
+        directory: Directory in which the output files are written.
+        name: Output file name without extension.
+        interpreter: Python interpreter running ATAC, by default the one running this module.
+        atac: Path of atac.py.
+        extend: Whether sentences are added to the model name in directory.
+        atac_args: Further command line arguments of ATAC, e.g., ["--no-layout"].
+    Returns:
+        Model with the paths of the model and query files (None if no specification
+        was given) and the lines of the messages ATAC wrote for the sentences it
+        could not use.
+    """
+    lines = []
+    for sentence in sentences:
+        # ATAC stops reading at the first line without a word.
+        lines += [line for line in sentence.split("\n") if re.search(r"[^\W_]", line)]
+    args = [interpreter, atac] + (["--extend", name] if extend else []) + list(atac_args)
+    stdin = ([] if extend else [name]) + lines + [""]
+    query_file_name = os.path.join(directory, name + ".q")
+    if not extend and os.path.exists(query_file_name):
+        # Left by an earlier model of the same name; ATAC writes no query file without specifications.
+        os.unlink(query_file_name)
+    proc = await asyncio.create_subprocess_exec(*args, cwd=directory,
+                                                stdin=asyncio.subprocess.PIPE,
+                                                stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.PIPE)
+    (stdout, stderr) = await proc.communicate(("\n".join(stdin) + "\n").encode("utf-8"))
+    if proc.returncode != 0:
+        raise CompileError(stderr.decode("utf-8", "replace").strip())
+    messages = [line for line in stderr.decode("utf-8", "replace").split("\n") if line.strip()]
+    return Model(os.path.join(directory, name + ".xml"),
+                 query_file_name if os.path.exists(query_file_name) else None,
+                 messages)
+
+
+async def verify(model_file_name, query_file_name, verifyta="verifyta", searchorder="bfs",
+                 statespacereduction="1", approximation="", callback=None, timeout=None):
+    """
+    Verifies the properties of a query file with a verifyta process.
+
+    Args:
+        model_file_name: Path of the model file.
+        query_file_name: Path of the query file.
+        verifyta: verifyta command.
+        searchorder, statespacereduction, approximation: Options of pyuppaal.verify.
+        callback: Called with (property, result, seconds) for every property as
+                  soon as its result is printed.
+        timeout: Seconds after which verifyta is killed if the current property
+                 has no result, which is then 'timeout'.
+    Returns:
+        List of results as returned by pyuppaal.verify.
+    """
+    searchorder = {"bfs": "0", "dfs": "1", "rdfs": "2", "ofs": "3", "rodfs": "4", "tfs": "6"}[searchorder]
+    args = shlex.split(verifyta) + ["-o" + searchorder, "-S" + statespacereduction]
+    if approximation == "over":
+        args += ["-A"]
+    args += ["-q", model_file_name, query_file_name]
+    proc = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL,
+                                                start_new_session=True)
+    output = pyuppaal.VerifytaOutput(callback)
+    loop = asyncio.get_running_loop()
+    deadline = None
+    while True:
+        try:
+            if deadline is None:
+                line = await proc.stdout.readline()
+            else:
+                line = await asyncio.wait_for(proc.stdout.readline(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+            output.add_result(output.lastprop, "timeout")
+            break
+        if not line:
+            break
+        lastprop = output.lastprop
+        output.feed(line.decode("utf-8", "replace").rstrip("\n"))
+        if timeout and output.lastprop != lastprop:
+            deadline = loop.time() + timeout if output.lastprop else None
+    await proc.wait()
+    return output.res
+
+
+async def compile_and_verify(sentences, directory, name="model", interpreter=sys.executable, atac=ATAC,
+                             verifyta="verifyta", atac_args=(), **options):
+    """
+    Constructs a TA model from sentences and verifies its specifications.
+
+    Args:
+        sentences, directory, name, interpreter, atac, atac_args: Arguments of compile_model.
+        verifyta, options: Arguments of verify.
+    Returns:
+        Tuple of the Model and the list of results, which is empty if no
+        specification was given.
+    """
+    model = await compile_model(sentences, directory, name, interpreter, atac, atac_args=atac_args)
+    if model.query_file_name is None:
+        return (model, [])
+    return (model, await verify(model.model_file_name, model.query_file_name, verifyta, **options))
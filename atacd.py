@@ -0,0 +1,144 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    ATAC daemon. The grammar is built and the libraries are imported once, when
+    the daemon starts. Every request is served by a child process forked from the
+    daemon, so that requests are handled concurrently and the model constructed
+    in the globals of atac never outlives its request.
+
+        POST /compile   {"sentences": [...], "reduce_spec_clocks": false, "prune": false,
+                         "normalize_constants": false, "layout": true,
+                         "budget_seconds": null, "budget_paths": null,
+                         "deduplicate_templates": false}
+                    ->  {"xml": "...", "queries": "...", "messages": [...]}
+
+    A request none of whose sentences constructs a template is answered with
+    400 and the messages of the sentences that could not be parsed. Templates
+    are laid out by default only if pygraphviz is installed; a request asking
+    for a layout without it is answered with 400.
+"""
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ForkingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ForkingMixIn
+import argparse
+import json
+import atac
+import objects
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+class ForkingHTTPServer(ForkingMixIn, HTTPServer):
+    """
+    HTTP server serving each request in a forked process.
+    """
+    max_children = 64
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles compile requests.
+    """
+    def do_POST(self):
+        if self.path != "/compile":
+            self.send_json(404, {"error": "unknown path " + self.path})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+            sentences = request["sentences"]
+            if not isinstance(sentences, list) or [s for s in sentences if not isinstance(s, string_types)]:
+                raise TypeError("sentences is not a list of strings")
+            (seconds, paths) = (request.get("budget_seconds"), request.get("budget_paths"))
+            budget = None
+            if seconds is not None or paths is not None:
+                budget = objects.Budget(None if seconds is None else float(seconds), None if paths is None else int(paths))
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"error": "expected a JSON object with a list of sentences as strings and numeric budgets"})
+            return
+        layout = bool(request.get("layout", self.server.layout))
+        if layout and not self.server.layout:
+            self.send_json(400, {"error": "pygraphviz is not installed, hence models cannot be laid out; "
+                                          "send \"layout\": false"})
+            return
+        try:
+            (xml, queries, messages) = atac.compile_sentences(sentences, bool(request.get("reduce_spec_clocks")),
+                                                              bool(request.get("prune")),
+                                                              bool(request.get("normalize_constants")),
+                                                              layout, budget,
+                                                              bool(request.get("deduplicate_templates")))
+        except atac.EmptyModelError as e:
+            self.send_json(400, {"error": str(e), "messages": e.messages})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200, {"xml": xml, "queries": queries, "messages": messages})
+
+    def send_json(self, code, response):
+        """
+        Sends the response as a JSON object.
+
+        Args:
+            code: HTTP status code.
+            response: Dictionary.
+        """
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+def warm_up():
+    """
+    Builds the parser and imports the libraries ATAC imports lazily, including
+    the ones used for the layout of the model, before any request is forked.
+
+    Returns:
+        Whether pygraphviz is installed, hence models can be laid out.
+    """
+    atac.get_parser()
+    import analysis
+    try:
+        import pygraphviz
+    except ImportError:
+        return False
+    return True
+
+def parse_arguments():
+    """
+    Parses command line arguments.
+    """
+    argument_parser = argparse.ArgumentParser(description="ATAC daemon")
+    argument_parser.add_argument("--port", type=int, default=8765,
+                                 help="port on localhost to listen on (default: 8765)")
+    argument_parser.add_argument("--quiet", action="store_true",
+                                 help="do not log requests")
+    return argument_parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    layout = warm_up()
+    server = ForkingHTTPServer(("127.0.0.1", args.port), RequestHandler)
+    server.quiet = args.quiet
+    server.layout = layout
+    print("ATAC daemon listening on http://127.0.0.1:" + str(args.port) + "/compile")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+    Benchmark of atac_async (Python 3).
+
+    Compiles and verifies generated inputs one after the other and then all
+    concurrently from one event loop. benchmarks/verifyta_stub.py is used in
+    place of verifyta. ATAC runs with the interpreter given by the ATAC_PYTHON
+    environment variable (default: the interpreter running the benchmark).
+
+    Usage: python3 benchmarks/bench_async.py [models]
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import atac_async
+from synthetic import generate_sentences
+
+STUB = sys.executable + " " + os.path.join(os.path.dirname(os.path.abspath(__file__)), "verifyta_stub.py")
+INTERPRETER = os.environ.get("ATAC_PYTHON", sys.executable)
+
+
+async def run(inputs, directory, concurrent):
+    jobs = [atac_async.compile_and_verify(sentences, directory, "model" + str(i), INTERPRETER, verifyta=STUB)
+            for (i, sentences) in enumerate(inputs)]
+    if concurrent:
+        return await asyncio.gather(*jobs)
+    return [await job for job in jobs]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    os.environ.setdefault("VERIFYTA_STUB_DELAY", "0.05")
+    inputs = [generate_sentences(templates=2, locations=5, transitions=8, invariants=1, seed=i) for i in range(n)]
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.time()
+        expected = asyncio.run(run(inputs, directory, False))
+        sequential = time.time() - start
+        print("%-12s %8.2f s" % ("sequential", sequential))
+        start = time.time()
+        results = asyncio.run(run(inputs, directory, True))
+        elapsed = time.time() - start
+        assert [r for (m, r) in results] == [r for (m, r) in expected]
+        print("%-12s %8.2f s  %5.1fx" % ("concurrent", elapsed, sequential / elapsed))
+        print("properties   %8d" % sum(len(r) for (m, r) in results))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
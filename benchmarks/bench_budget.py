@@ -0,0 +1,59 @@
+"""
+    Benchmark of the budget of the clock reduction of ATAC.
+
+    Compiles a template whose locations are all connected to each other without
+    a budget and with the given time and path count budgets, reporting the time,
+    the number of clocks of the model, and the templates that exceeded the budget.
+    Templates are not laid out.
+
+    Usage: python benchmarks/bench_budget.py [locations] [seconds] [paths]
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_dense_sentences
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atac.py")
+
+
+def compile_model(directory, sentences, options):
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, ATAC, "--no-layout"] + options, cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    (stdout, stderr) = proc.communicate(("model\n" + "\n".join(sentences) + "\n\n").encode("utf-8"))
+    elapsed = time.time() - start
+    assert proc.returncode == 0
+    f = open(os.path.join(directory, "model.xml"))
+    clocks = len(re.findall(r"\bclock\s+\w+;", f.read()))
+    f.close()
+    exceeded = [line for line in stdout.decode("utf-8").split("\n") if "exceeded its budget" in line]
+    return (elapsed, clocks, exceeded)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = sys.argv[2] if len(sys.argv) > 2 else "1"
+    paths = sys.argv[3] if len(sys.argv) > 3 else "100000"
+    sentences = generate_dense_sentences(n)
+    directory = tempfile.mkdtemp()
+    try:
+        for (name, options) in [("no budget", []), (seconds + " seconds", ["--budget-seconds", seconds]),
+                                (paths + " paths", ["--budget-paths", paths])]:
+            (elapsed, clocks, exceeded) = compile_model(directory, sentences, options)
+            print("%-16s %8.2f s  %4d clocks" % (name, elapsed, clocks))
+            for line in exceeded:
+                print("    " + line)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
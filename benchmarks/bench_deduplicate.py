@@ -0,0 +1,146 @@
+"""
+    Benchmark of the deduplication of templates of ATAC.
+
+    Compiles a generated network of copies of one automaton with and without
+    --deduplicate-templates, comparing the sizes of the models, the number of
+    templates and clocks, and the time to compile them. Templates are not laid
+    out.
+
+    Deduplication keeps the model equivalent, which is checked: both models
+    must have the same clocks, the same queries, and the same results of
+    random simulation runs, and the same query results if verifyta is given.
+    The same is checked for the model whose copies are given clocks of their
+    own, which become local to the deduplicated template, and the model whose
+    copies use each other's clocks must not be deduplicated at all.
+
+    Usage: python benchmarks/bench_deduplicate.py [copies] [--verifyta COMMAND]
+"""
+
+import argparse
+import copy
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import generate_replicated_sentences
+import analysis
+import pyuppaal
+import simulator
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atac.py")
+
+
+def compile_model(directory, sentences, options):
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, ATAC, "--no-layout"] + options, cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    proc.communicate(("model\n" + "\n".join(sentences) + "\n\n").encode("utf-8"))
+    elapsed = time.time() - start
+    assert proc.returncode == 0
+    f = open(os.path.join(directory, "model.xml"))
+    xml = f.read()
+    f.close()
+    f = open(os.path.join(directory, "model.q"))
+    queries = f.read()
+    f.close()
+    return (elapsed, xml, queries)
+
+
+def behaviour(nta):
+    """
+    Returns:
+        The results of random simulation runs of the model that do not depend
+        on its speed.
+    """
+    report = simulator.simulate(nta, runs=200, depth=50)
+    return dict((k, v) for (k, v) in report.items() if k not in ["seconds", "runs_per_second"])
+
+
+def check(plain, deduplicated, queries, verifyta, directory):
+    """
+    Checks that the deduplicated model is equivalent to the plain one.
+    """
+    assert analysis.estimate(deduplicated)["clocks"] == analysis.estimate(plain)["clocks"]
+    assert [p for (p, t) in analysis.instances(deduplicated)] == [p for (p, t) in analysis.instances(plain)]
+    assert behaviour(deduplicated) == behaviour(plain)
+    if verifyta:
+        results = []
+        for (name, nta) in [("plain", plain), ("deduplicated", deduplicated)]:
+            nta.to_file(os.path.join(directory, name + ".xml"))
+            f = open(os.path.join(directory, name + ".q"), "w")
+            f.write(queries)
+            f.close()
+            results.append(pyuppaal.verify(os.path.join(directory, name + ".xml"),
+                                           os.path.join(directory, name + ".q"), verifyta=verifyta))
+        assert results[0] == results[1]
+
+
+def rename_clocks(nta, renamings):
+    """
+    Renames the clocks of the templates of the model, declaring the new names
+    globally.
+
+    Args:
+        nta: pyuppaal.NTA, which is modified.
+        renamings: Dictionary. [template name : [clock : new name]].
+    """
+    for t in nta.templates:
+        renaming = renamings.get(str(t.name), {})
+        substitute = lambda text: analysis.IDENTIFIER.sub(lambda m: renaming.get(m.group(0), m.group(0)), text or "")
+        for l in t.locations:
+            l.invariant.value = substitute(l.invariant.get_value()) or l.invariant.value
+        for e in t.transitions:
+            for label in [e.guard, e.assignment]:
+                label.value = substitute(label.get_value()) or label.value
+    clocks = sorted(set([c for renaming in renamings.values() for c in renaming.values()]) -
+                    set(analysis.declared_clocks(nta.declaration)))
+    if clocks:
+        nta.declaration = (nta.declaration or "") + "clock " + ", ".join(clocks) + ";\n"
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Benchmark of the deduplication of templates of ATAC")
+    argument_parser.add_argument("copies", type=int, nargs="?", default=16, help="copies of the automaton (default: 16)")
+    argument_parser.add_argument("--verifyta", help="verifyta command to compare the query results with")
+    args = argument_parser.parse_args()
+    sentences = generate_replicated_sentences(copies=args.copies, locations=6, transitions=12, seed=0)
+    sentences += ["It shall always be the case that for Taa%d, the time spent after entering Taal1 is less than 50." % k
+                  for k in range(args.copies)]
+    directory = tempfile.mkdtemp()
+    try:
+        models = {}
+        for (name, options) in [("templates", []), ("deduplicated", ["--deduplicate-templates"])]:
+            (elapsed, xml, queries) = compile_model(directory, sentences, options)
+            f = open(os.path.join(directory, "model.xml"))
+            models[name] = (pyuppaal.NTA.from_xml(f), queries)
+            f.close()
+            print("%-12s %8d bytes %4d templates %4d clocks %8.2f s" % (name, len(xml), len(models[name][0].templates),
+                  analysis.estimate(models[name][0])["clocks"], elapsed))
+        (plain, queries) = models["templates"]
+        assert models["deduplicated"][1] == queries
+        check(plain, models["deduplicated"][0], queries, args.verifyta, directory)
+        clocks = analysis.declared_clocks(plain.declaration)
+        names = [str(t.name) for t in plain.templates]
+        own = copy.deepcopy(plain)
+        rename_clocks(own, dict((t, dict((c, c + "_" + t) for c in clocks)) for t in names))
+        crossed = copy.deepcopy(plain)
+        rename_clocks(crossed, dict((t, dict(zip(clocks, clocks[i:] + clocks[:i]))) for (i, t) in enumerate(names)))
+        for (name, nta) in [("own clocks", own), ("crossed", crossed)]:
+            deduplicated = copy.deepcopy(nta)
+            local_clocks = analysis.deduplicate_templates(deduplicated)
+            check(nta, deduplicated, queries, args.verifyta, directory)
+            print("%-12s %4d templates %4d local clocks" % (name, len(deduplicated.templates),
+                  len([c for m in local_clocks.values() for c in m])))
+        assert len(deduplicated.templates) == len(crossed.templates)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+    Benchmark of the clock dependency check used by the clock reduction.
+
+    Builds templates with many clocks and compares the time needed to build
+    the dependency graph with Template.is_dependent's bitmask representation
+    against the previous set based check, which intersects the locations of
+    every scope path with the reset locations of the other clock.
+
+    Usage: python benchmarks/bench_dependency.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import objects as objs
+
+
+def set_based_is_dependent(template, clock_1, clock_2):
+    """
+    The dependency check before the bitmask representation.
+    """
+    scope_1 = []
+    scope_2 = []
+    reset_locations_1 = [t[1] for t in clock_1.assignments]
+    reset_locations_2 = [t[1] for t in clock_2.assignments]
+    for t_r in clock_1.assignments:
+        for l_c in template.control_locations(clock_1):
+            scope_1.extend(template.compute_scope(clock_1, t_r[1], l_c))
+    for t_r in clock_2.assignments:
+        for l_c in template.control_locations(clock_2):
+            scope_2.extend(template.compute_scope(clock_2, t_r[1], l_c))
+    for path in scope_1:
+        if bool(set(path[1:]) & set(reset_locations_2)):
+            return True
+    for path in scope_2:
+        if bool(set(path[1:]) & set(reset_locations_1)):
+            return True
+    return False
+
+
+def generate(name, n_locations, n_clocks, seed):
+    """
+    Generates a template whose locations form a ring with a few chords and
+    whose clocks are guarded on a random transition and reset on entering
+    a random location.
+    """
+    rnd = random.Random(seed)
+    locations = [name + "l" + str(i) for i in range(n_locations)]
+    template = objs.Template(name, locations, locations[0])
+    transitions = []
+    for i in range(n_locations):
+        transitions += template.create_transition(transition=(locations[i], locations[(i + 1) % n_locations]))
+    for i in range(n_locations // 3):
+        transitions += template.create_transition(transition=(rnd.choice(locations), rnd.choice(locations)))
+    for i in range(n_clocks):
+        if rnd.random() < 0.8:
+            template.create_clock(guard_info=(rnd.choice(transitions), " >= " + str(rnd.randint(1, 9))), assignment_info=[("", rnd.choice(locations))])
+        else:
+            template.create_clock(invariant_info=([rnd.choice(locations)], " <= " + str(rnd.randint(10, 20))), assignment_info=[("", rnd.choice(locations))])
+    template.finalize_transitions()
+    template.remove_unnecessary_resets()
+    return template
+
+
+def main():
+    print("%8s %8s %12s %12s %8s" % ("clocks", "deps", "sets (s)", "bitmask (s)", "speedup"))
+    for n_clocks in [50, 100, 200]:
+        template = generate("Bench" + str(n_clocks), 14, n_clocks, n_clocks)
+        clocks = template.clocks
+        start = time.time()
+        expected = set((c_1.name, c_2.name) for c_1 in clocks for c_2 in clocks if set_based_is_dependent(template, c_1, c_2))
+        set_time = time.time() - start
+        start = time.time()
+        dependency_graph = template.generate_dependency_graph()
+        mask_time = time.time() - start
+        found = set((c_1.name, c_2.name) for c_1 in clocks for c_2 in dependency_graph[c_1])
+        assert found == expected
+        print("%8d %8d %12.3f %12.3f %7.1fx" % (len(clocks), len(found), set_time, mask_time, set_time / mask_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+    Benchmark of ATAC across Python interpreters.
+
+    Compiles the examples and generated inputs with ATAC run by each of the
+    given interpreters, e.g., Python 2 and Python 3, and reports the median
+    time of each, which includes the start-up of ATAC and the construction of
+    its parser, and the speedup of the last interpreter over the first one.
+    The models of the interpreters are checked to have the same templates,
+    locations, transitions, and queries; the order of the templates may
+    differ. Templates are not laid out.
+
+    Usage: python benchmarks/bench_interpreters.py [--runs N] [INTERPRETER...]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pyuppaal
+from synthetic import generate_dense_sentences, generate_replicated_sentences, generate_sentences
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ATAC = os.path.join(ROOT, "atac.py")
+
+
+def inputs():
+    """
+    Returns:
+        List of (name, sentences, options) of the workloads.
+    """
+    workloads = []
+    examples = os.path.join(ROOT, "examples")
+    for name in sorted(os.listdir(examples)):
+        f = open(os.path.join(examples, name, "input.txt"))
+        workloads.append((name, [line for line in f.read().splitlines() if line.strip()], []))
+        f.close()
+    workloads.append(("generated, 24 templates",
+                      generate_sentences(templates=24, locations=8, transitions=16, invariants=1, seed=0), []))
+    workloads.append(("dense, 6 locations", generate_dense_sentences(6), []))
+    workloads.append(("replicated, 16 copies", generate_replicated_sentences(copies=16),
+                      ["--deduplicate-templates"]))
+    return workloads
+
+
+def available(interpreter):
+    """
+    Checks if the interpreter runs and imports the libraries ATAC needs.
+    """
+    try:
+        return subprocess.call([interpreter, "-c", "import lark"], stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE) == 0
+    except OSError:
+        return False
+
+
+def compile_model(interpreter, directory, sentences, options):
+    for extension in [".xml", ".q", ".atac.json"]:
+        if os.path.exists(os.path.join(directory, "model" + extension)):
+            os.remove(os.path.join(directory, "model" + extension))
+    start = time.time()
+    proc = subprocess.Popen([interpreter, ATAC, "--no-layout"] + options, cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    proc.communicate(("model\n" + "\n".join(sentences) + "\n\n").encode("utf-8"))
+    elapsed = time.time() - start
+    assert proc.returncode == 0, interpreter + " failed"
+    return elapsed
+
+
+def structure(directory):
+    """
+    Returns:
+        The templates of the model, each with its numbers of locations and
+        transitions, and its queries, in an order independent of the model.
+    """
+    f = open(os.path.join(directory, "model.xml"))
+    nta = pyuppaal.NTA.from_xml(f)
+    f.close()
+    templates = sorted((str(t.name), t.parameter, len(t.locations), len(t.transitions)) for t in nta.templates)
+    queries = []
+    if os.path.exists(os.path.join(directory, "model.q")):
+        f = open(os.path.join(directory, "model.q"))
+        queries = sorted(f.read().splitlines())
+        f.close()
+    return (templates, queries)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Benchmark of ATAC across Python interpreters")
+    argument_parser.add_argument("interpreters", nargs="*", default=["python2", "python3"],
+                                 help="interpreters running ATAC (default: python2 python3)")
+    argument_parser.add_argument("--runs", type=int, default=3, help="runs of each workload (default: 3)")
+    args = argument_parser.parse_args()
+    interpreters = [i for i in args.interpreters if available(i)]
+    for i in args.interpreters:
+        if i not in interpreters:
+            print("skipping " + i + ", which does not run or has no lark")
+    if not interpreters:
+        return
+    print("%-26s" % "workload" + "".join(["%16s" % os.path.basename(i) for i in interpreters]))
+    directory = tempfile.mkdtemp()
+    try:
+        for (name, sentences, options) in inputs():
+            times = []
+            expected = None
+            for interpreter in interpreters:
+                runs = sorted([compile_model(interpreter, directory, sentences, options) for k in range(args.runs)])
+                times.append(runs[len(runs) // 2])
+                model = structure(directory)
+                assert expected is None or model == expected, name + ": the models of the interpreters differ"
+                expected = model
+            print("%-26s" % name + "".join(["%13.1f ms" % (1000 * t) for t in times]) +
+                  ("  (%.2fx)" % (times[0] / times[-1]) if len(times) > 1 else ""))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
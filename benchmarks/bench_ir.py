@@ -0,0 +1,75 @@
+"""
+    Benchmark of the intermediate representation of ATAC.
+
+    Compiles a generated network of automata with --emit-ir and compares the
+    sizes of the xml and the intermediate representation and the times to
+    parse the xml with NTA.from_xml, to load the intermediate representation,
+    and to build the network from it, checking that it converts back to the
+    same xml. Templates are not laid out.
+
+    Usage: python benchmarks/bench_ir.py [templates] [runs]
+"""
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import generate_sentences
+import ir
+import pyuppaal
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atac.py")
+
+
+def read(path, mode="r"):
+    f = open(path, mode)
+    data = f.read()
+    f.close()
+    return data
+
+
+def median_time(runs, function, *args):
+    times = []
+    for i in range(runs):
+        start = time.time()
+        result = function(*args)
+        times.append(time.time() - start)
+    return (sorted(times)[len(times) // 2], result)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    sentences = generate_sentences(templates=n, locations=8, transitions=16, invariants=1, seed=0)
+    directory = tempfile.mkdtemp()
+    try:
+        proc = subprocess.Popen([sys.executable, ATAC, "--no-layout", "--emit-ir"], cwd=directory,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        proc.communicate(("model\n" + "\n".join(sentences) + "\n\n").encode("utf-8"))
+        assert proc.returncode == 0
+        xml = read(os.path.join(directory, "model.xml"))
+        data = read(os.path.join(directory, "model.atac.ir"), "rb")
+    finally:
+        shutil.rmtree(directory)
+    print("%d templates: xml %d bytes, intermediate representation %d bytes" % (n, len(xml), len(data)))
+    (parse, nta) = median_time(runs, lambda: pyuppaal.NTA.from_xml(StringIO(xml)))
+    (load, model) = median_time(runs, ir.loads, data)
+    (build, nta) = median_time(runs, model.to_nta)
+    print("NTA.from_xml       %8.2f ms" % (1000 * parse))
+    print("ir.loads           %8.2f ms  (%.0fx)" % (1000 * load, parse / load))
+    print("ir.loads + to_nta  %8.2f ms  (%.1fx)" % (1000 * (load + build), parse / (load + build)))
+    assert nta.to_xml() == xml
+
+
+if __name__ == "__main__":
+    main()
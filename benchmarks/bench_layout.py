@@ -0,0 +1,81 @@
+"""
+    Benchmark of the post-processing of the layout in pyuppaal.
+
+    Sharpens transitions with many nails with Transition.sharpen and with the
+    scan restarting from the first nail after every removal that it replaced,
+    checking that both keep the same nails, and maps the coordinates of a
+    template one at a time with dot2uppaalcoord and at once with dot2uppaalcoords.
+
+    Usage: python benchmarks/bench_layout.py [nails] [coordinates]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pyuppaal
+
+
+def restarting_sharpen(transition, angleThreshold, lengthThreshold):
+    count = 0
+    while True:
+        points = [(transition.source.xpos, transition.source.ypos)] + \
+            [(n.xpos, n.ypos) for n in transition.nails] + [(transition.target.xpos, transition.target.ypos)]
+        for i in range(len(transition.nails)):
+            (prev, cur, next) = points[i:i + 3]
+            v1 = (prev[0] - cur[0], prev[1] - cur[1])
+            v2 = (next[0] - cur[0], next[1] - cur[1])
+            v1len = math.sqrt(v1[0] * v1[0] + v1[1] * v1[1])
+            v2len = math.sqrt(v2[0] * v2[0] + v2[1] * v2[1])
+            if v1len < lengthThreshold or v2len < lengthThreshold or \
+                    math.degrees(math.acos(max(-1.0, min((v1[0] * v2[0] + v1[1] * v2[1]) / (v1len * v2len), 1.0)))) > angleThreshold:
+                del transition.nails[i]
+                count += 1
+                break
+        else:
+            return count
+
+
+def transitions(n, seed):
+    rnd = random.Random(seed)
+    result = []
+    for i in range(8):
+        transition = pyuppaal.Transition(pyuppaal.Location(xpos=0, ypos=0), pyuppaal.Location(xpos=10 * n, ypos=0))
+        # A zigzag, most of whose nails are removed.
+        transition.nails = [pyuppaal.Nail(10 * j, rnd.choice([-1, 1]) * rnd.randint(0, 40)) for j in range(1, n)]
+        result.append(transition)
+    return result
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return (result, time.time() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    sharpened = []
+    for (name, sharpen) in [("restarting", restarting_sharpen), ("single pass", pyuppaal.Transition.sharpen)]:
+        ts = transitions(n, 0)
+        (counts, elapsed) = timed(lambda: [sharpen(t, 110.0, 1.0) for t in ts])
+        sharpened.append([[(nail.xpos, nail.ypos) for nail in t.nails] for t in ts] + [counts])
+        print("sharpen %-12s %8.1f ms  %d of %d nails removed" % (name, 1000 * elapsed, sum(counts), 8 * (n - 1)))
+    assert sharpened[0] == sharpened[1]
+    template = pyuppaal.Template("T")
+    rnd = random.Random(0)
+    coords = ["%.2f" % rnd.uniform(-2000, 2000) for i in range(m)]
+    (one, elapsed) = timed(lambda: [template.dot2uppaalcoord(c) for c in coords])
+    print("coordinates one by one %8.1f ms" % (1000 * elapsed))
+    (batch, elapsed) = timed(template.dot2uppaalcoords, coords)
+    print("coordinates at once    %8.1f ms  (NumPy: %s)" % (1000 * elapsed, "yes" if pyuppaal.import_numpy() else "no"))
+    assert one == batch
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+    Memory benchmark for the model objects.
+
+    Builds a large model through objects.Template the way atac expands
+    location lists (every location to every location) and reports the
+    number of bytes held per transition by the pyuppaal objects and
+    per clock by the objects.Clock instances.
+
+    Usage: python benchmarks/bench_memory.py [number_of_locations]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import interface
+import objects as objs
+
+
+def deep_size(obj, seen=None):
+    """
+    Returns the number of bytes reachable from obj, counting shared objects once.
+
+    Args:
+        obj: Root object.
+        seen: Set of ids of already counted objects.
+    """
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or o is None or isinstance(o, (bool, int)):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        if hasattr(o, "__dict__"):
+            stack.append(o.__dict__)
+        for cls in type(o).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                stack.append(getattr(o, slot, None))
+    return size
+
+
+def generate(n):
+    """
+    Generates a template with n locations, a transition between each pair
+    of locations and a clock guarding each transition.
+
+    Args:
+        n: Number of locations.
+    Returns:
+        The objects.Template and its pyuppaal.Template counterpart.
+    """
+    locations = ["L" + str(i) for i in range(n)]
+    template = objs.Template("Bench", locations, locations[0])
+    transitions = []
+    for li in locations:
+        for lj in locations:
+            transitions += template.create_transition(transition=(li, lj), receive_synch="", send_synch="")
+    for t in transitions:
+        template.create_clock(guard_info=(t, " >= 1"), invariant_info=(), assignment_info=[("", t[0])])
+    return template, interface._templates["Bench"]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    template, uppaal_template = generate(n)
+    # Locations are shared by all transitions, count them separately.
+    seen = set()
+    location_bytes = deep_size(uppaal_template.locations, seen)
+    transition_bytes = deep_size(uppaal_template.transitions, seen)
+    clock_bytes = deep_size(template.clocks, seen)
+    print("locations: %d, transitions: %d, clocks: %d" % (n, len(uppaal_template.transitions), len(template.clocks)))
+    print("bytes per location:   %.1f" % (float(location_bytes) / n))
+    print("bytes per transition: %.1f" % (float(transition_bytes) / len(uppaal_template.transitions)))
+    print("bytes per clock:      %.1f" % (float(clock_bytes) / len(template.clocks)))
+
+
+if __name__ == "__main__":
+    main()
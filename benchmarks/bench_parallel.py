@@ -0,0 +1,57 @@
+"""
+    Benchmark of the parallel clock reduction of ATAC.
+
+    Compiles a generated network of automata with --jobs 1 and with more
+    jobs, checking that the models and queries are identical. Templates are
+    not laid out.
+
+    Usage: python benchmarks/bench_parallel.py [templates] [jobs]
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_sentences
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atac.py")
+
+
+def compile_model(directory, sentences, jobs):
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, ATAC, "--no-layout", "--jobs", str(jobs)], cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    proc.communicate(("model\n" + "\n".join(sentences) + "\n\n").encode("utf-8"))
+    elapsed = time.time() - start
+    assert proc.returncode == 0
+    outputs = []
+    for extension in [".xml", ".q"]:
+        f = open(os.path.join(directory, "model" + extension))
+        outputs.append(f.read())
+        f.close()
+    return (elapsed, outputs)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+    sentences = generate_sentences(templates=n, locations=8, transitions=16, invariants=1, seed=0)
+    directory = tempfile.mkdtemp()
+    try:
+        (sequential, expected) = compile_model(directory, sentences, 1)
+        print("%d templates, %2d jobs %8.2f s" % (n, 1, sequential))
+        (parallel, outputs) = compile_model(directory, sentences, jobs)
+        print("%d templates, %2d jobs %8.2f s  (%.2fx)" % (n, jobs, parallel, sequential / parallel))
+        assert outputs == expected
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+    Differential benchmark of the clock reduction of ATAC.
+
+    Constructs the templates of the examples and of generated inputs of growing
+    size, reduces the clocks of each template with Template.reduce and with the
+    original reduction kept in reference.py, and reports for every input the
+    time each takes and whether they give the same clocks up to their names,
+    i.e., the same number of clocks with the same guards, invariants, and
+    resets, and the same clock mappings. Specification clocks, which only
+    Template.reduce shares between queries, are left out of the comparison.
+    A reduction that raises an exception, including running out of the memory
+    the benchmark is limited to, is reported as failed along with the
+    exception. The exit status is 1 if any template differs or fails.
+
+    Usage: python benchmarks/bench_reference.py [--max-locations N] [--memory-limit MB]
+"""
+
+import argparse
+import copy
+import glob
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate_sentences, generate_dense_sentences
+import atac
+import interface
+import reference
+
+
+def construct(sentences):
+    """
+    Returns:
+        Dictionary of the templates of the sentences by name, not reduced yet.
+    """
+    atac._TAs = atac.TemplateTable()
+    interface._nta = None
+    for line in sentences:
+        line = atac.normalize_line(line)
+        if line:
+            atac.run_line(line)
+    return dict(atac._TAs)
+
+
+def canonical(clocks, clock_mapping, spec_clocks):
+    """
+    Describes reduced clocks and their clock mapping without the names of the
+    clocks, leaving out the given specification clocks.
+
+    Returns:
+        Tuple of the descriptions of the clocks and of the clock mapping.
+    """
+    conditions = lambda v: tuple(sorted(v if isinstance(v, list) else [v]))
+    describe = lambda c: (tuple(sorted((t, conditions(v)) for (t, v) in c.guards.items())),
+                          tuple(sorted((l, conditions(v)) for (l, v) in c.invariants.items())),
+                          tuple(sorted(set(c.assignments))))
+    names = dict((c.name, describe(c)) for c in clocks if c.name not in spec_clocks)
+    mapping = dict((c, tuple(sorted(set([names.get(x, x) for x in m if x not in spec_clocks]), key=repr)))
+                   for (c, m) in clock_mapping.items() if c not in spec_clocks)
+    return (sorted(names.values()), mapping)
+
+
+def run(reduce):
+    """
+    Returns:
+        Tuple of the result of reduce, or the exception it raised, and the
+        seconds it took.
+    """
+    start = time.time()
+    try:
+        result = reduce()
+    except Exception as e:
+        result = e
+    return (result, time.time() - start)
+
+
+def compare(templates):
+    """
+    Reduces the clocks of the templates both ways.
+
+    Returns:
+        Tuple of the number of clocks before and after the reduction, the
+        seconds the reference and the optimized reduction took, and the list of
+        the differences and failures.
+    """
+    (before, after, reference_time, optimized_time) = (0, 0, 0.0, 0.0)
+    problems = []
+    for ta in sorted(templates.keys()):
+        template = templates[ta]
+        before += len(template.clocks)
+        spec_clocks = set(c.name for c in template.clocks if c.is_spec_clock)
+        (expected, seconds) = run(lambda: reference.reduce(template))
+        reference_time += seconds
+        optimized = copy.deepcopy(template)
+        (clock_mapping, seconds) = run(lambda: optimized.reduce())
+        optimized_time += seconds
+        after += len(optimized.clocks)
+        if isinstance(expected, Exception):
+            problems.append(ta + ": reference fails with " + type(expected).__name__ + ": " + str(expected))
+        if isinstance(clock_mapping, Exception):
+            problems.append(ta + ": optimized fails with " + type(clock_mapping).__name__ + ": " + str(clock_mapping))
+        if problems and problems[-1].startswith(ta + ":"):
+            continue
+        (expected_clocks, expected_mapping) = canonical(expected[0], expected[1], spec_clocks)
+        (clocks, mapping) = canonical(optimized.clocks, clock_mapping, spec_clocks)
+        if clocks != expected_clocks:
+            problems.append(ta + ": clocks differ, %d in the reference and %d optimized" %
+                            (len(expected_clocks), len(clocks)))
+        for c in sorted(set(mapping.keys()) | set(expected_mapping.keys())):
+            if mapping.get(c) != expected_mapping.get(c):
+                problems.append(ta + ": clock mapping of " + c + " differs, %d clocks in the reference and %d optimized" %
+                                (len(expected_mapping.get(c, ())), len(mapping.get(c, ()))))
+    return (before, after, reference_time, optimized_time, problems)
+
+
+def inputs(max_locations):
+    """
+    Returns:
+        List of (name, sentences) pairs of the examples and generated inputs.
+    """
+    result = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*", "input.txt"))):
+        f = open(path)
+        result.append((os.path.basename(os.path.dirname(path)), f.read().split("\n")))
+        f.close()
+    for locations in range(4, max_locations + 1, 2):
+        for invariants in [1, 3]:
+            result.append(("generated, %d locations, %d inv" % (locations, invariants),
+                           generate_sentences(templates=4, locations=locations, transitions=2 * locations,
+                                              invariants=invariants, seed=locations)))
+    for locations in range(4, min(max_locations, 6) + 1):
+        result.append(("dense, %d locations" % locations, generate_dense_sentences(locations)))
+    return result
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Differential benchmark of the clock reduction of ATAC")
+    argument_parser.add_argument("--max-locations", type=int, default=10,
+                                 help="locations of the largest generated template (default: 10)")
+    argument_parser.add_argument("--memory-limit", type=int, default=2048,
+                                 help="megabytes of memory the benchmark may use (default: 2048)")
+    args = argument_parser.parse_args()
+    limit = args.memory_limit * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    print("%-32s %8s %12s %12s %8s  %s" % ("input", "clocks", "reference", "optimized", "ratio", "result"))
+    all_problems = []
+    for (name, sentences) in inputs(args.max_locations):
+        (before, after, reference_time, optimized_time, problems) = compare(construct(sentences))
+        print("%-32s %3d->%-3d %9.1f ms %9.1f ms %7.1fx  %s" % (name, before, after, 1000 * reference_time,
+              1000 * optimized_time, reference_time / max(optimized_time, 1e-6),
+              "same" if not problems else "%d problems" % len(problems)))
+        all_problems += [name + ", " + p for p in problems]
+    for p in all_problems:
+        print(p)
+    sys.exit(1 if all_problems else 0)
+
+
+if __name__ == "__main__":
+    main()
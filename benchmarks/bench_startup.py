@@ -0,0 +1,74 @@
+"""
+    Benchmark of the startup of ATAC.
+
+    Measures, for the smallest example, the time until ATAC asks for the output
+    file name, the time to compile the example from the start of the process, and
+    for reference the time to import every library ATAC uses and build the parser,
+    which the first prompt waited for before they were imported lazily. Templates
+    are not laid out unless --layout is given, which requires pygraphviz.
+
+    Usage: python benchmarks/bench_startup.py [--runs N] [--layout]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ATAC = os.path.join(ROOT, "atac.py")
+EXAMPLE = os.path.join(ROOT, "examples", "gate", "input.txt")
+EAGER = "import atac, objects, analysis, simulator; atac.get_parser()"
+
+
+def first_prompt(directory):
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, "-u", ATAC], cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    while not proc.stdout.readline().startswith(b"Enter output file name"):
+        pass
+    elapsed = time.time() - start
+    proc.kill()
+    proc.wait()
+    return elapsed
+
+
+def compile_example(directory, layout):
+    f = open(EXAMPLE)
+    sentences = f.read().strip()
+    f.close()
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, ATAC] + ([] if layout else ["--no-layout"]), cwd=directory,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    proc.communicate(("gate\n" + sentences + "\n\n").encode("utf-8"))
+    assert proc.returncode == 0 and os.path.exists(os.path.join(directory, "gate.xml"))
+    return time.time() - start
+
+
+def eager_imports(directory):
+    start = time.time()
+    subprocess.check_call([sys.executable, "-c", EAGER], cwd=ROOT)
+    return time.time() - start
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Benchmark of the startup of ATAC")
+    argument_parser.add_argument("--runs", type=int, default=10, help="runs of each measurement (default: 10)")
+    argument_parser.add_argument("--layout", action="store_true", help="lay out the templates with Graphviz")
+    args = argument_parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        for (name, measure) in [("first prompt", first_prompt),
+                                ("compile", lambda d: compile_example(d, args.layout)),
+                                ("eager imports", eager_imports)]:
+            times = sorted([measure(directory) for i in range(args.runs)])
+            print("%-14s median %7.1f ms  min %7.1f ms" % (name, 1000 * times[len(times) // 2], 1000 * times[0]))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
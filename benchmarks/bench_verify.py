@@ -0,0 +1,51 @@
+"""
+    Benchmark of pyuppaal.verify against pyuppaal.verify_parallel.
+
+    Uses benchmarks/verifyta_stub.py in place of verifyta, so every property
+    takes a fixed time to check, and verifies a query file with the given
+    number of properties sequentially and with increasing numbers of jobs.
+
+    Usage: python benchmarks/bench_verify.py [properties] [seconds per property]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pyuppaal
+
+STUB = sys.executable + " " + os.path.join(os.path.dirname(os.path.abspath(__file__)), "verifyta_stub.py")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    os.environ["VERIFYTA_STUB_DELAY"] = sys.argv[2] if len(sys.argv) > 2 else "0.25"
+    (fd, modelfilename) = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    (fd, queryfilename) = tempfile.mkstemp(suffix=".q")
+    f = os.fdopen(fd, "w")
+    f.write("//Generated by bench_verify.py\n")
+    for i in range(n):
+        f.write("A[] not deadlock\n" if i % 3 else "/* an unsatisfied one */\nE<> false\n")
+    f.close()
+    try:
+        start = time.time()
+        expected = pyuppaal.verify(modelfilename, queryfilename, verifyta=STUB)
+        sequential = time.time() - start
+        print("%-12s %8.2f s" % ("sequential", sequential))
+        for jobs in [1, 2, 4, 8]:
+            start = time.time()
+            res = pyuppaal.verify_parallel(modelfilename, queryfilename, verifyta=STUB, jobs=jobs)
+            elapsed = time.time() - start
+            assert res == expected, (res, expected)
+            print("%-12s %8.2f s  %5.1fx" % ("jobs=%d" % jobs, elapsed, sequential / elapsed))
+    finally:
+        os.unlink(modelfilename)
+        os.unlink(queryfilename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+    Benchmark of pyuppaal.verify_cached.
+
+    Uses benchmarks/verifyta_stub.py in place of verifyta and verifies a
+    query file four times with an empty cache directory: cold, warm, after
+    moving every location of the model (a layout-only change, which keeps
+    the cached results), and after changing one property of the query file.
+
+    Usage: python benchmarks/bench_verify_cache.py [properties] [seconds per property]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pyuppaal
+
+STUB = sys.executable + " " + os.path.join(os.path.dirname(os.path.abspath(__file__)), "verifyta_stub.py")
+
+
+def write_model(path, offset):
+    locations = [pyuppaal.Location(name="L" + str(i), xpos=100 * i + offset, ypos=offset) for i in range(4)]
+    template = pyuppaal.Template("T", locations=locations, initlocation=locations[0])
+    for i in range(4):
+        template.transitions.append(pyuppaal.Transition(locations[i], locations[(i + 1) % 4], guard="x >= " + str(i)))
+        template.transitions[-1].nails = [pyuppaal.Nail(offset, offset)]
+    template.assign_ids()
+    nta = pyuppaal.NTA(declaration="clock x;\n", system="system T;\n", templates=[template])
+    f = open(path, "w")
+    f.write(nta.to_xml())
+    f.close()
+
+
+def write_queries(path, n, changed=None):
+    f = open(path, "w")
+    for i in range(n):
+        f.write("E<> T.L%d and x > %d\n" % (i % 4, i if i != changed else n + i))
+    f.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    os.environ["VERIFYTA_STUB_DELAY"] = sys.argv[2] if len(sys.argv) > 2 else "0.1"
+    workdir = tempfile.mkdtemp()
+    modelfilename = os.path.join(workdir, "model.xml")
+    queryfilename = os.path.join(workdir, "model.q")
+    cache = pyuppaal.ResultCache(os.path.join(workdir, "cache"))
+    try:
+        write_model(modelfilename, 0)
+        write_queries(queryfilename, n)
+        expected = pyuppaal.verify(modelfilename, queryfilename, verifyta=STUB)
+        for (run, offset, changed) in [("cold", 0, None), ("warm", 0, None), ("moved", 37, None), ("1 changed", 37, 0)]:
+            write_model(modelfilename, offset)
+            write_queries(queryfilename, n, changed)
+            verified = []
+            start = time.time()
+            res = pyuppaal.verify_cached(modelfilename, queryfilename, verifyta=STUB, cache=cache,
+                                         callback=lambda prop, result, seconds: seconds and verified.append(prop))
+            elapsed = time.time() - start
+            assert res == expected, (res, expected)
+            print("%-12s %8.2f s  %3d verified" % (run, elapsed, len(verified)))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
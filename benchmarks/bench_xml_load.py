@@ -0,0 +1,81 @@
+"""
+    Load-time benchmark for pyuppaal.NTA.from_xml.
+
+    Writes a large generated model and loads it back in a child process,
+    reporting the load time and the increase of the peak resident set size
+    caused by loading.
+
+    Usage: python benchmarks/bench_xml_load.py [templates] [locations] [transitions]
+"""
+
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pyuppaal
+
+
+def generate(path, n_templates, n_locations, n_transitions, seed=0):
+    """
+    Writes a model with the given number of templates, locations per
+    template, and transitions per template to path.
+    """
+    rnd = random.Random(seed)
+    nta = pyuppaal.NTA(declaration="chan a;\nclock x;\n", system="system " + ", ".join("T" + str(i) for i in range(n_templates)) + ";\n")
+    for i in range(n_templates):
+        locations = [pyuppaal.Location(name="L" + str(j), invariant="x <= 10", xpos=j, ypos=j) for j in range(n_locations)]
+        template = pyuppaal.Template(pyuppaal.Label("name", "T" + str(i)), locations=locations, initlocation=locations[0])
+        for j in range(n_transitions):
+            transition = pyuppaal.Transition(rnd.choice(locations), rnd.choice(locations), guard="x >= 5", synchronisation="a!", assignment="x = 0")
+            transition.guard.xpos, transition.guard.ypos = j, j
+            transition.nails = [pyuppaal.Nail(j, j), pyuppaal.Nail(j + 1, j + 1)]
+            template.transitions.append(transition)
+        template.assign_ids()
+        nta.add_template(template)
+    f = open(path, "w")
+    f.write(nta.to_xml())
+    f.close()
+
+
+def load(path):
+    """
+    Loads the model in path and prints load time and peak memory increase.
+    """
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    nta = pyuppaal.NTA.from_xml(open(path))
+    elapsed = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("%d %f %d" % (sum(len(t.transitions) for t in nta.templates), elapsed, after - before))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--load":
+        load(sys.argv[2])
+        return
+    n_templates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_locations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    n_transitions = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    (fd, path) = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        generate(path, n_templates, n_locations, n_transitions)
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--load", path])
+        transitions, elapsed, peak = output.decode("ascii").split()
+        print("file size:           %.1f MB" % (os.path.getsize(path) / 1e6))
+        print("templates:           %d" % n_templates)
+        print("transitions:         %s" % transitions)
+        print("load time:           %.3f s" % float(elapsed))
+        print("peak memory growth:  %.1f MB" % (int(peak) / 1024.0))
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
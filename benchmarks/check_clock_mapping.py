@@ -0,0 +1,69 @@
+"""
+    Check of the clock mappings of the clock reduction of ATAC.
+
+    Reduces the clocks of a template whose clocks are merged with the original
+    reduction kept in reference.py and with Template.reduce, and prints both
+    clock mappings. The original merge_clocks gave all clocks one list that
+    grew with every merge, so every clock was mapped to all the clocks, and a
+    query reading the specification clock x_5 was rewritten to read the first
+    of them. Checks that each clock is now mapped to the clocks carrying its
+    own guards and invariants, which are all clocks of the reduced template,
+    and the specification clock to itself.
+
+    Usage: python benchmarks/check_clock_mapping.py
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_reference import construct
+import reference
+
+SENTENCES = [
+    "Tab can be Tabl0 Tabl1 Tabl2 Tabl3 and it is initially Tabl0.",
+    "If the time spent after entering Tabl2 is equal to 15, then Tab can go from Tabl0 to Tabl1.",
+    "Tab can go from Tabl1 to Tabl2.",
+    "Tab can go from Tabl2 to Tabl3.",
+    "If the time spent after leaving Tabl1 is less than 12, then Tab can go from Tabl3 to Tabl0.",
+    "If the time spent after leaving Tabl3 is more than 19, then Tab can go from Tabl2 to Tabl2.",
+    "If the time spent after leaving Tabl1 is more than or equal to 17, then Tab can go from Tabl3 to Tabl3.",
+    "Tab can go from Tabl3 to Tabl2.",
+    "For Tab, the time spent in Tabl2 cannot be more than 40.",
+    "For Tab, Tabl3 shall hold within every 54.",
+    "It shall always be the case that for Tab, the time spent after entering Tabl1 is less than 82.",
+]
+
+
+def show(title, clock_mapping):
+    print(title)
+    for c in sorted(clock_mapping.keys(), key=lambda x: int(x[2:])):
+        print("    %-4s -> %s" % (c, " ".join(sorted(clock_mapping[c], key=lambda x: int(x[2:])))))
+
+
+def main():
+    template = construct(SENTENCES)["Tab"]
+    (clocks, old) = reference.reduce(template)
+    show("original merge_clocks:", old)
+    reduced = copy.deepcopy(template)
+    new = reduced.reduce()
+    show("merge_clocks:", new)
+    names = dict((c.name, c) for c in reduced.clocks)
+    for c in template.clocks:
+        assert set(new[c.name]) <= set(names.keys()), c.name
+        assert len(set(new[c.name])) == len(new[c.name]), c.name
+        mapped = [names[x] for x in new[c.name]]
+        if c.is_spec_clock:
+            assert new[c.name] == [c.name], c.name
+        for t in c.guards.keys():
+            assert [x for x in mapped if t in x.guards], (c.name, t)
+        for l in c.invariants.keys():
+            assert [x for x in mapped if l in x.invariants], (c.name, l)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+    Load generator for the ATAC daemon (atacd.py).
+
+    Sends compile requests with generated inputs from concurrent clients and
+    reports throughput and latency percentiles. With --cold, the same inputs
+    are also given to a new ATAC process each, for comparison.
+
+    Usage: python benchmarks/load_generator.py [--url URL] [--requests N] [--concurrency C] [--cold]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+try:
+    from urllib2 import Request, urlopen
+except ImportError:
+    from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_sentences
+
+ATAC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atac.py")
+
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))]
+
+
+def report(name, latencies, elapsed):
+    print("%-8s %6d requests %8.1f req/s   p50 %7.1f ms   p90 %7.1f ms   p99 %7.1f ms" % (
+        name, len(latencies), len(latencies) / elapsed,
+        1000 * percentile(latencies, 50), 1000 * percentile(latencies, 90), 1000 * percentile(latencies, 99)))
+
+
+def run_clients(inputs, concurrency, send):
+    """
+    Sends the inputs with concurrency clients and returns the latencies and the total time.
+    """
+    latencies = []
+    lock = threading.Lock()
+    pending = list(reversed(inputs))
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                sentences = pending.pop()
+            start = time.time()
+            send(sentences)
+            latency = time.time() - start
+            with lock:
+                latencies.append(latency)
+
+    start = time.time()
+    threads = [threading.Thread(target=client) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (latencies, time.time() - start)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Load generator for the ATAC daemon")
+    argument_parser.add_argument("--url", default="http://127.0.0.1:8765/compile")
+    argument_parser.add_argument("--requests", type=int, default=200)
+    argument_parser.add_argument("--concurrency", type=int, default=8)
+    argument_parser.add_argument("--cold", action="store_true",
+                                 help="also run a new ATAC process for every input")
+    args = argument_parser.parse_args()
+    inputs = [generate_sentences(templates=2, locations=5, transitions=8, invariants=1, seed=i)
+              for i in range(args.requests)]
+
+    def send(sentences):
+        request = Request(args.url, json.dumps({"sentences": sentences}).encode("utf-8"),
+                          {"Content-Type": "application/json"})
+        response = json.loads(urlopen(request).read())
+        assert "<nta>" in response["xml"]
+
+    directory = tempfile.mkdtemp()
+
+    def run_atac(sentences):
+        proc = subprocess.Popen([sys.executable, ATAC], cwd=directory, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (stdout, stderr) = proc.communicate(("\n".join(["model" + str(id(sentences))] + sentences + [""]) + "\n").encode("utf-8"))
+        assert proc.returncode == 0, stderr
+
+    (latencies, elapsed) = run_clients(inputs, args.concurrency, send)
+    report("daemon", latencies, elapsed)
+    if args.cold:
+        (latencies, elapsed) = run_clients(inputs, args.concurrency, run_atac)
+        report("cold", latencies, elapsed)
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+    Generator of synthetic ATAC inputs used by the benchmarks.
+"""
+
+import random
+import re
+
+def generate_sentences(templates=2, locations=6, transitions=12, timed=0.6, synchs=0.3, invariants=2, specs=2, seed=0):
+    """
+    Generates a random but well-formed ATAC input description.
+
+    Args:
+        templates: Number of TA templates.
+        locations: Number of locations per template.
+        transitions: Number of transition sentences per template.
+        timed: Probability of a transition sentence having a timed condition.
+        synchs: Probability of a transition sentence sending or receiving a signal.
+        invariants: Number of invariant sentences per template.
+        specs: Number of specification sentences per template.
+        seed: Random seed.
+    Returns:
+        List of sentences.
+    """
+    rnd = random.Random(seed)
+    signals = ["Sig" + chr(ord("a") + i) for i in range(max(2, templates))]
+    sentences = []
+    for k in range(templates):
+        name = "Ta" + chr(ord("a") + k % 26) * (1 + k // 26)
+        locs = [name + "l" + str(i) for i in range(locations)]
+        sentences.append("%s can be %s and it is initially %s." % (name, " ".join(locs), locs[0]))
+        for i in range(transitions):
+            source = locs[i % locations] if i < locations else rnd.choice(locs)
+            target = locs[(i + 1) % locations] if i < locations else rnd.choice(locs)
+            condition = None
+            if rnd.random() < timed:
+                op = rnd.choice(["more than", "more than or equal to", "less than", "less than or equal to", "equal to"])
+                condition = "the time spent after %s %s is %s %d" % (rnd.choice(["entering", "leaving"]), rnd.choice(locs), op, rnd.randint(1, 20))
+            synch = rnd.random() < synchs
+            if synch and condition is None and rnd.random() < 0.5:
+                sentences.append("If %s is received, then %s can go from %s to %s." % (rnd.choice(signals), name, source, target))
+            elif synch and condition is None:
+                sentences.append("%s can send %s and go from %s to %s." % (name, rnd.choice(signals), source, target))
+            elif synch and rnd.random() < 0.5:
+                sentences.append("If %s is received and %s, then %s can go from %s to %s." % (rnd.choice(signals), condition, name, source, target))
+            elif synch:
+                sentences.append("If %s, then %s can send %s and go from %s to %s." % (condition, name, rnd.choice(signals), source, target))
+            elif condition:
+                sentences.append("If %s, then %s can go from %s to %s." % (condition, name, source, target))
+            else:
+                sentences.append("%s can go from %s to %s." % (name, source, target))
+        for i in range(invariants):
+            if rnd.random() < 0.5:
+                sentences.append("For %s, the time spent in %s cannot be more than %d." % (name, rnd.choice(locs), rnd.randint(20, 40)))
+            else:
+                sentences.append("For %s, the time spent after entering %s cannot be more than %d in %s." % (name, rnd.choice(locs), rnd.randint(20, 40), rnd.choice(locs)))
+        for i in range(specs):
+            choice = rnd.randint(0, 2)
+            if choice == 0:
+                sentences.append("It might eventually be the case that for %s, %s holds." % (name, rnd.choice(locs)))
+            elif choice == 1:
+                sentences.append("It shall always be the case that for %s, the time spent after entering %s is less than %d." % (name, rnd.choice(locs), rnd.randint(50, 100)))
+            else:
+                sentences.append("For %s, %s shall hold within every %d." % (name, rnd.choice(locs), rnd.randint(50, 100)))
+    return sentences
+
+def generate_dense_sentences(locations=8):
+    """
+    Generates an ATAC input description of one template whose locations are all
+    connected to each other by timed transitions. The number of simple paths, and
+    with it the time the clock reduction takes, grows factorially with locations.
+
+    Args:
+        locations: Number of locations.
+    Returns:
+        List of sentences.
+    """
+    locs = ["Dl" + str(i) for i in range(locations)]
+    sentences = ["Dense can be %s and it is initially %s." % (" ".join(locs), locs[0])]
+    for i in range(locations):
+        for j in range(locations):
+            if i != j:
+                sentences.append("If the time spent after entering %s is more than %d, then Dense can go from %s to %s." %
+                                 (locs[(i + j) % locations], i + 1, locs[i], locs[j]))
+    return sentences
+
+def generate_replicated_sentences(copies=8, locations=6, transitions=12, seed=0):
+    """
+    Generates an ATAC input description of copies of one random template, which
+    differ only in their names, e.g., a network of identical trains.
+
+    Args:
+        copies: Number of copies of the template.
+        locations: Number of locations of the template.
+        transitions: Number of transition sentences of the template.
+        seed: Random seed.
+    Returns:
+        List of sentences.
+    """
+    sentences = generate_sentences(templates=1, locations=locations, transitions=transitions, specs=0, seed=seed)
+    return [re.sub(r"\bTaa\b", "Taa" + str(k), s) for k in range(copies) for s in sentences]
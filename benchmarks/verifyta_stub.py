@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+    Stand-in for UPPAAL's verifyta used by the verification benchmarks.
+
+    Accepts verifyta's command line (options followed by the model and the
+    query file) and prints verifyta's progress output for every property of
+    the query file. Checking a property takes VERIFYTA_STUB_DELAY seconds
+    (default 0.2). A property is not satisfied if it contains "false" and
+    a property containing "hang" never finishes.
+"""
+
+import os
+import re
+import sys
+import time
+
+
+def main():
+    delay = float(os.environ.get("VERIFYTA_STUB_DELAY", "0.2"))
+    queryfilename = sys.argv[-1]
+    f = open(queryfilename)
+    text = f.read()
+    f.close()
+    # Keep line numbers while dropping comments.
+    text = re.sub(r"/\*.*?\*/", lambda m: "\n" * m.group(0).count("\n"), text, flags=re.S)
+    n = 0
+    for (i, line) in enumerate(text.split("\n")):
+        line = line.split("//")[0].strip()
+        if not line:
+            continue
+        n += 1
+        sys.stdout.write("Verifying property %d at line %d\n" % (n, i + 1))
+        sys.stdout.flush()
+        while "hang" in line:
+            time.sleep(1)
+        time.sleep(delay)
+        if "false" in line:
+            sys.stdout.write(" -- Property is NOT satisfied.\n")
+        else:
+            sys.stdout.write(" -- Property is satisfied.\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
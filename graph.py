@@ -0,0 +1,281 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+"""
+
+from array import array
+
+class Graph(object):
+    """
+    Compact directed multigraph of a TA template. Locations are mapped to
+    integer ids in insertion order and edges are stored in parallel arrays
+    of source ids, target ids, and transition ids. Successor queries use a
+    CSR adjacency that is rebuilt lazily after the graph is modified.
+    """
+    def __init__(self):
+        """
+        Initializes an empty graph.
+        """
+        self.names = [] # [id : location name]
+        self.ids = {} # [location name : id]
+        self.sources = array("i")
+        self.targets = array("i")
+        self.keys = array("i") # transition ids
+        self.offsets = None
+        self.successors = None
+        self.edge_order = None
+        self.edge_offsets = None
+        self.path_masks = {} # [(source id, target id) : bitmask]
+        self.budget = None # objects.Budget charged for the paths enumerated, if any
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def add_node(self, name):
+        """
+        Adds the given location if it is not in the graph.
+
+        Args:
+            name: Location name.
+        Returns:
+            Integer id of the location.
+        """
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.offsets = None
+        return self.ids[name]
+
+    def add_nodes_from(self, names):
+        """
+        Adds all given locations.
+
+        Args:
+            names: List of location names.
+        """
+        for name in names:
+            self.add_node(name)
+
+    def add_edge(self, source, target, key):
+        """
+        Adds an edge between given locations, adding the locations if necessary.
+
+        Args:
+            source: Source location name.
+            target: Target location name.
+            key: Transition id of the edge.
+        """
+        self.sources.append(self.add_node(source))
+        self.targets.append(self.add_node(target))
+        self.keys.append(key)
+        self.offsets = None
+
+    def number_of_edges(self):
+        return len(self.keys)
+
+    def build(self):
+        """
+        Builds the CSR adjacency. Successors of location i are the distinct
+        targets successors[offsets[i]:offsets[i + 1]] and the edges leaving
+        location i are edge_order[edge_offsets[i]:edge_offsets[i + 1]].
+        """
+        n = len(self.names)
+        self.path_masks = {}
+        outgoing = [[] for _ in range(n)]
+        for e in range(len(self.keys)):
+            outgoing[self.sources[e]].append(e)
+        self.edge_order = array("i")
+        self.edge_offsets = array("i", [0])
+        self.successors = array("i")
+        self.offsets = array("i", [0])
+        for i in range(n):
+            self.edge_order.extend(outgoing[i])
+            self.edge_offsets.append(len(self.edge_order))
+            seen = set()
+            for e in outgoing[i]:
+                if self.targets[e] not in seen:
+                    seen.add(self.targets[e])
+                    self.successors.append(self.targets[e])
+            self.offsets.append(len(self.successors))
+
+    def edge(self, e):
+        """
+        Returns:
+            Edge e as a (source, target, t_id) triple.
+        """
+        return (self.names[self.sources[e]], self.names[self.targets[e]], self.keys[e])
+
+    def edges(self):
+        """
+        Returns:
+            List of (source, target, t_id) triples grouped by source location.
+        """
+        if self.offsets is None:
+            self.build()
+        return [self.edge(e) for e in self.edge_order]
+
+    def out_edges(self, source):
+        """
+        Returns:
+            List of (source, target, t_id) triples leaving the given location.
+        """
+        if source not in self.ids:
+            return []
+        if self.offsets is None:
+            self.build()
+        i = self.ids[source]
+        return [self.edge(e) for e in self.edge_order[self.edge_offsets[i]:self.edge_offsets[i + 1]]]
+
+    def all_simple_path_ids(self, source, target):
+        """
+        Generates all simple paths between two location ids. Parallel edges
+        yield a single path. As in NetworkX, no path is generated if
+        source == target.
+
+        Args:
+            source: Source location id.
+            target: Target location id.
+        """
+        if self.offsets is None:
+            self.build()
+        if source == target:
+            return
+        offsets, successors = self.offsets, self.successors
+        budget = self.budget
+        path = [source]
+        on_path = set(path)
+        stack = [iter(successors[offsets[source]:offsets[source + 1]])]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif child == target:
+                if budget is not None:
+                    budget.charge(1)
+                yield path + [target]
+            elif child not in on_path:
+                if budget is not None:
+                    budget.charge(0)
+                path.append(child)
+                on_path.add(child)
+                stack.append(iter(successors[offsets[child]:offsets[child + 1]]))
+
+    def all_simple_paths(self, source, target):
+        """
+        Generates all simple paths between two locations as lists of location names.
+
+        Args:
+            source: Source location name.
+            target: Target location name.
+        """
+        names = self.names
+        for path in self.all_simple_path_ids(self.ids[source], self.ids[target]):
+            yield [names[i] for i in path]
+
+    def path_mask(self, source, target):
+        """
+        Computes the set of locations appearing on the simple paths between
+        two location ids, excluding the source, as a bitmask over location
+        ids. Results are cached until the graph is modified.
+
+        Args:
+            source: Source location id.
+            target: Target location id.
+        Returns:
+            Integer whose bit i is set iff location i is on a path.
+        """
+        if self.offsets is None:
+            self.build()
+        key = (source, target)
+        if key in self.path_masks:
+            return self.path_masks[key]
+        mask = 0
+        if source != target:
+            offsets, successors = self.offsets, self.successors
+            budget = self.budget
+            target_bit = 1 << target
+            path_masks = [1 << source]
+            stack = [iter(successors[offsets[source]:offsets[source + 1]])]
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    stack.pop()
+                    path_masks.pop()
+                elif child == target:
+                    if budget is not None:
+                        budget.charge(1)
+                    mask |= path_masks[-1] | target_bit
+                elif not path_masks[-1] >> child & 1:
+                    if budget is not None:
+                        budget.charge(0)
+                    path_masks.append(path_masks[-1] | 1 << child)
+                    stack.append(iter(successors[offsets[child]:offsets[child + 1]]))
+            mask &= ~(1 << source)
+        self.path_masks[key] = mask
+        return mask
+
+    def reachable_ids(self, source):
+        """
+        Returns:
+            Set of ids of the locations reachable from the given location id
+            through at least one edge.
+        """
+        if self.offsets is None:
+            self.build()
+        offsets, successors = self.offsets, self.successors
+        reached = set()
+        stack = [source]
+        while stack:
+            i = stack.pop()
+            for j in successors[offsets[i]:offsets[i + 1]]:
+                if j not in reached:
+                    reached.add(j)
+                    stack.append(j)
+        return reached
+
+    def has_path(self, source, target):
+        """
+        Checks if there is a simple path from source to target, i.e., target
+        is reachable from source and they are different locations.
+        """
+        return source != target and self.ids[target] in self.reachable_ids(self.ids[source])
+
+    def to_networkx(self):
+        """
+        Exports the graph as a NetworkX MultiDiGraph keyed by transition ids.
+        """
+        import networkx as nx
+        g = nx.MultiDiGraph()
+        g.add_nodes_from(self.names)
+        for e in range(len(self.keys)):
+            g.add_edge(self.names[self.sources[e]], self.names[self.targets[e]], self.keys[e])
+        return g
+
+
+def greedy_color(nodes, neighbours):
+    """
+    Greedy graph coloring with the largest first strategy, following
+    NetworkX's greedy_color: nodes are visited in decreasing order of
+    degree (a self-loop counts twice, ties keep the given order) and each
+    node gets the smallest color not used by its neighbours.
+
+    Args:
+        nodes: List of nodes.
+        neighbours: Dictionary. [node : set of adjacent nodes].
+    Returns:
+        colors: Dictionary. [node : color].
+    """
+    degree = lambda u: len(neighbours[u]) + (1 if u in neighbours[u] else 0)
+    colors = {}
+    for u in sorted(nodes, key=degree, reverse=True):
+        neighbour_colors = set(colors[v] for v in neighbours[u] if v in colors)
+        color = 0
+        while color in neighbour_colors:
+            color += 1
+        colors[u] = color
+    return colors
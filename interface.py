@@ -13,6 +13,7 @@ Current template is manipulated by the functions and when is finished it is adde
 """
 _nta = None
 _templates = {}
+_loaded_templates = []
 
 def initialize(template_name):
     """
@@ -25,6 +26,40 @@ def initialize(template_name):
     return
 
 
+def load(input_file_name):
+    """
+    Loads the nta object from the given xml file. Its templates are kept as they are
+    unless a template with the same name is created. Parametrised templates are
+    replaced by a template for each of their instances, named after the instance.
+
+    Args:
+        input_file_name: Name of the input xml file.
+    """
+    global _nta, _loaded_templates
+    import analysis
+    xml_file = open(input_file_name)
+    _nta = pyuppaal.NTA.from_xml(xml_file)
+    xml_file.close()
+    analysis.expand_instances(_nta)
+    _nta.system = _nta.system.strip().rstrip(";")
+    _loaded_templates = list(_nta.templates)
+    return
+
+
+def remove_loaded_template(template_name):
+    """
+    Removes the loaded template with the given name from the nta object.
+    """
+    global _nta
+    for t in _loaded_templates:
+        if str(t.name) == template_name:
+            _loaded_templates.remove(t)
+            _nta.templates.remove(t)
+            names = [n for n in _nta.system[len("system "):].split(", ") if n != template_name]
+            _nta.system = "system " + ", ".join(names) if names else ""
+            return
+
+
 def create_template(template_name, list_of_locations): # while proccessing input make initial location the first element
     """
     Creates a new template with given name and locations.
@@ -34,6 +69,7 @@ def create_template(template_name, list_of_locations): # while proccessing input
         list_of_locations: List of location in the template.
     """
     global _nta
+    remove_loaded_template(template_name)
     n = len(list_of_locations)
     temp = [pyuppaal.Location(name=list_of_locations[i]) for i in range(0, n)]
     _templates[template_name] = pyuppaal.Template(name=pyuppaal.Label("name", template_name), locations=temp, initlocation=temp[0])
@@ -48,6 +84,7 @@ def add_current_template_to_nta(template_name):
     global _nta
     try:
         assert _templates[template_name] != None
+        _templates[template_name].transitions = [t for t in _templates[template_name].transitions if t is not None]
         _nta.add_template(_templates[template_name])
         if _nta.system:
             _nta.system += ", " + _templates[template_name].name.value
@@ -103,6 +140,42 @@ def create_transition(template_name, source, target, synch=""):
     return len(_templates[template_name].transitions) - 1
 
 
+def get_transitions(template_name):
+    """
+    Returns:
+        List of (source, target, synchronisation) triples of the transitions of the
+        template in the order of their transition ids.
+    """
+    return [(t.source.name.value, t.target.name.value, t.synchronisation.get_value()) for t in _templates[template_name].transitions]
+
+
+def get_synchronisation(template_name, transition_id):
+    """
+    Returns:
+        Synchronisation of the transition with the given id.
+    """
+    if transition_id == -1:
+        return ""
+    return _templates[template_name].transitions[transition_id].synchronisation.get_value()
+
+
+def remove_transitions(template_name, transition_ids):
+    """
+    Removes the transitions with the given ids from the current_template. Ids of
+    the other transitions do not change until the template is added to the nta.
+    """
+    for i in transition_ids:
+        if i != -1:
+            _templates[template_name].transitions[i] = None
+
+
+def remove_locations(template_name, location_names):
+    """
+    Removes the locations with the given names from the current_template.
+    """
+    _templates[template_name].locations = [l for l in _templates[template_name].locations if l.name.value not in location_names]
+
+
 def add_guard(template_name, transition_id, clock_name, list_of_guards):
     """
     Adds a guard to the current_template.
@@ -158,13 +231,51 @@ def complete(output_file_name):
     Args:
         output_file_name: Name of the output xml file.
     """
-    global _nta
-    _nta.system += ";\n"
-    map(lambda x: x.layout(), _nta.templates)
     xml_file = open(output_file_name, "w")
-    xml_file.write(_nta.to_xml())
+    xml_file.write(complete_to_string())
     xml_file.close()
 
+def complete_to_string(layout=True, layouts=None):
+    """
+    Completes the model. Returns the model in xml format.
+
+    Args:
+        layout: Whether the templates are laid out with Graphviz. Otherwise
+                pygraphviz is not imported and every location is left at the origin.
+        layouts: Dictionary. [structure hash : pyuppaal.Template]. The coordinates
+                 of these templates are reused for the templates with the same
+                 structure, which are not laid out again.
+    """
+    global _nta
+    _nta.system += ";\n"
+    for template in filter(lambda x: x not in _loaded_templates, _nta.templates):
+        if not layout:
+            template.assign_ids()
+        elif layouts and template.structure_hash() in layouts:
+            template.copy_layout(layouts[template.structure_hash()])
+        else:
+            template.layout()
+    return _nta.to_xml()
+
+def read_layouts(input_file_name):
+    """
+    Reads the layouts of the templates of a model from the given xml file.
+
+    Args:
+        input_file_name: Name of the input xml file.
+    Returns:
+        Dictionary. [structure hash : pyuppaal.Template], which is empty if the
+        file is not a model.
+    """
+    xml_file = open(input_file_name)
+    try:
+        nta = pyuppaal.NTA.from_xml(xml_file)
+    except (SyntaxError, KeyError, ValueError):
+        return {}
+    finally:
+        xml_file.close()
+    return dict((t.structure_hash(), t) for t in nta.templates)
+
 def create_committed_location(template_name, name):
     """
     Creates a commited location and adds to the location list.
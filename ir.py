@@ -0,0 +1,340 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    Compact binary intermediate representation of models generated by ATAC. It
+    holds the completed network of automata, including the layout, along with
+    the queries, the clock mappings, and the local clocks of the processes, so
+    that later stages of a pipeline load a model without parsing its XML, which
+    is written only when it is needed.
+
+    A file starts with the magic bytes ATACIR and the version as an unsigned
+    16 bit integer, followed by the string table and the integer array, each
+    preceded by its size as an unsigned 32 bit integer. The strings are UTF-8
+    encoded and separated by NUL characters. The integers are signed 32 bit
+    integers in little-endian byte order, in which strings are given by their
+    indices in the string table plus one, absent strings by 0, and absent
+    coordinates by NONE:
+
+        scale, queries,
+        clock mapping count, (template, clock, n, n clocks)...,
+        local clock count, (process, clock, local clock)...,
+        declaration, system, clock count, clocks...,
+        template count, templates...
+
+    where a template is
+
+        name, parameter, declaration, location count, initial location index,
+        transition count, (location id, x, y, name, name x, name y,
+        invariant, invariant x, invariant y, flags)...,
+        (source index, target index, flags, action, (label, label x, label y)
+        of the select, guard, synchronisation, and assignment, nail count,
+        (nail x, nail y)...)...
+
+    and the flags of a location are 1 if it is committed and 2 if it is urgent,
+    and the flag of a transition is 1 if it is controllable. Branchpoints and
+    exponential rates, which ATAC does not generate, are not represented.
+"""
+
+import argparse
+import array
+import struct
+import sys
+import analysis
+import pyuppaal
+
+MAGIC = b"ATACIR"
+VERSION = 1
+NONE = -2 ** 31
+LABELS = ["select", "guard", "synchronisation", "assignment"]
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+class Writer(object):
+    """
+    Builds the string table and the integer array of a model.
+    """
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+        self.ints = array.array("i")
+
+    def int(self, n):
+        self.ints.append(NONE if n is None else int(n))
+
+    def string(self, s):
+        if s is None:
+            self.ints.append(0)
+            return
+        if isinstance(s, text_type):
+            s = s.encode("utf-8")
+        if s not in self.indices:
+            self.strings.append(s)
+            self.indices[s] = len(self.strings)
+        self.ints.append(self.indices[s])
+
+    def label(self, label):
+        self.string(label.value)
+        self.int(label.xpos)
+        self.int(label.ypos)
+
+    def template(self, template):
+        locations = [l for l in template.locations if isinstance(l, pyuppaal.Location)]
+        index = dict((id(l), i) for (i, l) in enumerate(locations))
+        self.string(str(template.name))
+        self.string(template.parameter)
+        self.string(template.declaration)
+        self.int(len(locations))
+        self.int(index.get(id(template.initlocation)))
+        self.int(len(template.transitions))
+        for l in locations:
+            self.string(l.id)
+            self.int(l.xpos)
+            self.int(l.ypos)
+            self.label(l.name)
+            self.label(l.invariant)
+            self.int((1 if l.committed else 0) | (2 if l.urgent else 0))
+        for t in template.transitions:
+            self.int(index[id(t.source)])
+            self.int(index[id(t.target)])
+            self.int(1 if t.controllable else 0)
+            self.string(t.action)
+            for kind in LABELS:
+                self.label(getattr(t, kind))
+            self.int(len(t.nails))
+            for n in t.nails:
+                self.int(n.xpos)
+                self.int(n.ypos)
+
+    def to_bytes(self):
+        ints = array.array("i", self.ints)
+        if sys.byteorder != "little":
+            ints.byteswap()
+        strings = b"\0".join(self.strings)
+        ints = ints.tobytes() if hasattr(ints, "tobytes") else ints.tostring()
+        return MAGIC + struct.pack("<HI", VERSION, len(strings)) + strings + struct.pack("<I", len(ints)) + ints
+
+class Reader(object):
+    """
+    Reads the integers of a model in order.
+    """
+    def __init__(self, strings, ints, position=0):
+        """
+        Args:
+            strings: List of the strings of the string table preceded by None.
+            ints: List of the integers.
+            position: Index of the first integer to read.
+        """
+        self.strings = strings
+        self.ints = ints
+        self.position = position
+
+    def int(self):
+        n = self.ints[self.position]
+        self.position += 1
+        return None if n == NONE else n
+
+    def string(self):
+        n = self.ints[self.position]
+        self.position += 1
+        return self.strings[n]
+
+    def templates(self):
+        """
+        Reads the templates, which take most of a model, with the position and
+        the tables in local variables.
+
+        Returns:
+            List of pyuppaal.Template.
+        """
+        (ints, strings, Label, Nail) = (self.ints, self.strings, pyuppaal.Label, pyuppaal.Nail)
+        p = self.position + 1
+        templates = []
+        for k in range(ints[p - 1]):
+            (name, parameter, declaration, location_count, initial, transition_count) = ints[p:p + 6]
+            p += 6
+            locations = []
+            for i in range(location_count):
+                (lid, x, y, n, nx, ny, inv, ix, iy, flags) = ints[p:p + 10]
+                p += 10
+                l = pyuppaal.Location(id=strings[lid], xpos=None if x == NONE else x, ypos=None if y == NONE else y,
+                                      committed=bool(flags & 1), urgent=bool(flags & 2))
+                l.name = Label("name", strings[n], None if nx == NONE else nx, None if ny == NONE else ny)
+                l.invariant = Label("invariant", strings[inv], None if ix == NONE else ix, None if iy == NONE else iy)
+                locations.append(l)
+            transitions = []
+            for i in range(transition_count):
+                t = pyuppaal.Transition(locations[ints[p]], locations[ints[p + 1]])
+                (t.controllable, t.action) = (bool(ints[p + 2] & 1), strings[ints[p + 3]])
+                p += 4
+                for kind in LABELS:
+                    (v, x, y) = ints[p:p + 3]
+                    setattr(t, kind, Label(kind, strings[v], None if x == NONE else x, None if y == NONE else y))
+                    p += 3
+                t.nails = [Nail(None if ints[j] == NONE else ints[j], None if ints[j + 1] == NONE else ints[j + 1])
+                           for j in range(p + 1, p + 1 + 2 * ints[p], 2)]
+                p += 1 + 2 * ints[p]
+                transitions.append(t)
+            templates.append(pyuppaal.Template(strings[name], strings[declaration] or "", locations,
+                                               None if initial == NONE else locations[initial], transitions,
+                                               strings[parameter] or ""))
+        self.position = p
+        return templates
+
+class IR(object):
+    """
+    Model loaded from its intermediate representation. The queries, the clock
+    mappings, the local clocks, and the clocks of the model are decoded when it
+    is loaded; the network of automata is built by to_nta.
+    """
+    def __init__(self, strings, ints):
+        """
+        Args:
+            strings: List of the strings of the string table.
+            ints: array.array of the integers.
+        """
+        reader = Reader([None] + strings, ints.tolist())
+        self.strings = reader.strings
+        self.ints = reader.ints
+        self.scale = reader.int()
+        self.queries = reader.string() or ""
+        self.clock_mappings = {}
+        for i in range(reader.int()):
+            (template, clock) = (reader.string(), reader.string())
+            self.clock_mappings.setdefault(template, {})[clock] = [reader.string() for j in range(reader.int())]
+        self.local_clocks = {}
+        for i in range(reader.int()):
+            (process, clock) = (reader.string(), reader.string())
+            self.local_clocks.setdefault(process, {})[clock] = reader.string()
+        self.declaration = reader.string() or ""
+        self.system = reader.string() or ""
+        self.clocks = [reader.string() for i in range(reader.int())]
+        self.position = reader.position
+
+    def to_nta(self):
+        """
+        Returns:
+            pyuppaal.NTA of the model.
+        """
+        reader = Reader(self.strings, self.ints, self.position)
+        return pyuppaal.NTA(self.declaration, self.system, reader.templates())
+
+    def to_xml(self):
+        """
+        Returns:
+            The model in xml format, the same as the one ATAC writes.
+        """
+        return self.to_nta().to_xml()
+
+def dumps(nta, queries="", clock_mappings=None, local_clocks=None, scale=1):
+    """
+    Returns the intermediate representation of a completed model.
+
+    Args:
+        nta: pyuppaal.NTA of the completed model.
+        queries: Queries of the model.
+        clock_mappings: Dictionary. [template name : [clock : list of clocks]] of the clocks
+                        replaced during completion.
+        local_clocks: Dictionary. [process name : [clock : local clock]] of the processes of
+                      deduplicated templates.
+        scale: Divisor of the time constants of the model.
+    Returns:
+        String of bytes.
+    """
+    writer = Writer()
+    writer.int(scale)
+    writer.string(queries)
+    mappings = [(t, c, m) for (t, mapping) in sorted((clock_mappings or {}).items()) for (c, m) in sorted(mapping.items())]
+    writer.int(len(mappings))
+    for (t, c, m) in mappings:
+        writer.string(t)
+        writer.string(c)
+        writer.int(len(m))
+        for x in m:
+            writer.string(x)
+    locals_ = [(p, c, x) for (p, local) in sorted((local_clocks or {}).items()) for (c, x) in sorted(local.items())]
+    writer.int(len(locals_))
+    for (p, c, x) in locals_:
+        writer.string(p)
+        writer.string(c)
+        writer.string(x)
+    writer.string(nta.declaration)
+    writer.string(nta.system)
+    clocks = analysis.model_clocks(nta)
+    writer.int(len(clocks))
+    for c in clocks:
+        writer.string(c)
+    writer.int(len(nta.templates))
+    for t in nta.templates:
+        writer.template(t)
+    return writer.to_bytes()
+
+def dump(f, nta, queries="", clock_mappings=None, local_clocks=None, scale=1):
+    """
+    Writes the intermediate representation of a completed model to the given
+    binary file. The arguments are those of dumps.
+    """
+    f.write(dumps(nta, queries, clock_mappings, local_clocks, scale))
+
+def loads(data):
+    """
+    Loads a model from its intermediate representation.
+
+    Args:
+        data: String of bytes.
+    Returns:
+        IR.
+    Raises:
+        ValueError: If data is not an intermediate representation of this version.
+    """
+    header = len(MAGIC) + struct.calcsize("<HI")
+    if len(data) < header or not data.startswith(MAGIC):
+        raise ValueError("not an ATAC intermediate representation")
+    (version, size) = struct.unpack("<HI", data[len(MAGIC):header])
+    if version != VERSION:
+        raise ValueError("unsupported version " + str(version) + " of the ATAC intermediate representation")
+    strings = data[header:header + size].split(b"\0")
+    if text_type is str:
+        strings = [s.decode("utf-8") for s in strings]
+    (count,) = struct.unpack("<I", data[header + size:header + size + 4])
+    ints = array.array("i")
+    if hasattr(ints, "frombytes"):
+        ints.frombytes(data[header + size + 4:header + size + 4 + count])
+    else:
+        ints.fromstring(data[header + size + 4:header + size + 4 + count])
+    if sys.byteorder != "little":
+        ints.byteswap()
+    return IR(strings, ints)
+
+def load(f):
+    """
+    Loads a model from the intermediate representation in the given binary file.
+
+    Returns:
+        IR.
+    """
+    return loads(f.read())
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Converts the intermediate representation of a "
+                                                          "model generated by ATAC to UPPAAL files")
+    argument_parser.add_argument("model", help="intermediate representation file, NAME.atac.ir")
+    argument_parser.add_argument("output", help="name of the output files, OUTPUT.xml and OUTPUT.q")
+    args = argument_parser.parse_args()
+    f = open(args.model, "rb")
+    model = load(f)
+    f.close()
+    f = open(args.output + ".xml", "w")
+    f.write(model.to_xml())
+    f.close()
+    if model.queries:
+        f = open(args.output + ".q", "w")
+        f.write(model.queries)
+        f.close()
+
+if __name__ == "__main__":
+    main()
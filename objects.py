@@ -4,9 +4,12 @@
     by the METU Cyber-Physical Systems Research Group.
 """
 
+from __future__ import print_function
+import copy
 import sys
+import time
 import interface
-import networkx as nx
+from graph import Graph, greedy_color
 
 def write_to_xml(output_file_name):
     """
@@ -17,18 +20,164 @@ def write_to_xml(output_file_name):
     """
     interface.complete(output_file_name)
 
+def to_xml(layout=True, layouts=None):
+    """
+    Returns all TA templates in xml format.
+
+    Args:
+        layout: Whether the templates are laid out with Graphviz.
+        layouts: Templates returned by read_layouts whose coordinates are reused.
+    """
+    return interface.complete_to_string(layout, layouts)
+
+def read_layouts(input_file_name):
+    """
+    Reads the layouts of the templates of a model from the given xml file, e.g.,
+    the model written by an earlier run, so that unchanged templates keep them.
+    """
+    return interface.read_layouts(input_file_name)
+
+def spec_clock_key(assignments):
+    """
+    Returns the key identifying a specification clock by its resets, ignoring
+    the reset on the initial transition.
+
+    Args:
+        assignments: List of transitions, (source, target, t_id), on which the
+                     clock is reset, as given by Template.finalize_transitions.
+    """
+    return tuple(sorted(set(t for t in assignments if t[0] != "LOCATION_ZERO")))
+
+def get_nta():
+    """
+    Returns the pyuppaal.NTA of the model.
+    """
+    return interface._nta
+
+def read_from_xml(input_file_name):
+    """
+    Reads a model generated by ATAC from the given xml file. The model is extended
+    by the templates created afterwards.
+
+    Args:
+        input_file_name: Name of the xml file.
+    """
+    interface.load(input_file_name)
+
+class BudgetExceeded(Exception):
+    """
+    Raised when the clock reduction of a template exceeds its budget.
+    """
+    pass
+
+class Budget(object):
+    """
+    Time and path count budget of the clock reduction of a template. It is
+    charged by the enumerations of simple paths of graph.Graph, on which the
+    reduction spends its time.
+    """
+    def __init__(self, seconds=None, paths=None):
+        """
+        Args:
+            seconds: Seconds the reduction of a template may take, or None.
+            paths: Number of simple paths the reduction of a template may enumerate, or None.
+        """
+        self.seconds = seconds
+        self.paths = paths
+        self.restart()
+
+    def restart(self):
+        """
+        Restarts the budget for the reduction of another template.
+        """
+        self.start = time.time()
+        self.path_count = 0
+        self.steps = 0
+
+    def charge(self, paths):
+        """
+        Charges a step of a path enumeration, which completes the given number of paths.
+        The time is checked once in every 1024 steps.
+
+        Raises:
+            BudgetExceeded: If the budget is exceeded.
+        """
+        self.path_count += paths
+        if self.paths is not None and self.path_count > self.paths:
+            raise BudgetExceeded("more than " + str(self.paths) + " paths")
+        self.steps += 1
+        if self.seconds is not None and not self.steps % 1024 and time.time() - self.start > self.seconds:
+            raise BudgetExceeded("more than " + str(self.seconds) + " seconds")
+
+def reduce_template(arguments):
+    """
+    Reduces the clocks of a template, possibly in a worker process of complete_templates.
+
+    Args:
+        arguments: Tuple of the template, reduce_spec_clocks, and budget of Template.reduce.
+    Returns:
+        Tuple of the reduced clocks, the clock mapping, the clock count, the
+        numbers of shared and folded specification clocks, and budget_exceeded
+        of the template.
+    """
+    (template, reduce_spec_clocks, budget) = arguments
+    clock_mapping = template.reduce(reduce_spec_clocks, budget)
+    return (template.clocks, clock_mapping, template.clock_count, template.shared_spec_clock_count,
+            template.folded_spec_clock_count, template.budget_exceeded)
+
+def complete_templates(templates, reduce_spec_clocks=False, jobs=1, budget=None):
+    """
+    Completes the given templates. The reduction of a template never reads another
+    template, so with more than one job the templates are reduced in a pool of
+    worker processes, which send back only the reduced clocks. The templates are
+    added to the model in the given order either way.
+
+    Args:
+        templates: Dictionary of templates by name.
+        reduce_spec_clocks: Whether specification clocks are replaced by the
+                            clocks of the templates where possible.
+        jobs: Number of worker processes.
+        budget: Budget of the reduction of each template, or None.
+    Returns:
+        Dictionary of the clock mappings of the templates by name.
+    """
+    names = list(templates.keys())
+    arguments = [(templates[name], reduce_spec_clocks, budget) for name in names]
+    if jobs > 1 and len(names) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(min(jobs, len(names)))
+        try:
+            results = pool.map(reduce_template, arguments, 1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(reduce_template, arguments)
+    clock_mappings = {}
+    for (name, (clocks, clock_mapping, clock_count, shared_spec_clock_count, folded_spec_clock_count,
+                budget_exceeded)) in zip(names, results):
+        template = templates[name]
+        template.clocks = clocks
+        template.clock_count = clock_count
+        template.shared_spec_clock_count = shared_spec_clock_count
+        template.folded_spec_clock_count = folded_spec_clock_count
+        template.budget_exceeded = budget_exceeded
+        template.emit()
+        clock_mappings[name] = clock_mapping
+    return clock_mappings
+
 class Template(object):
     """
     TA template that is described by the input.
     """
-    def __init__(self, name, locations, initial_location, ta=nx.MultiDiGraph(), clocks=[], clock_count=0): # locations[0] is the initial location.
+    def __init__(self, name, locations, initial_location, ta=None, clocks=[], clock_count=0): # locations[0] is the initial location.
         """
         Initializes the object. Initially only name, locations, and initial location must be provided.
 
         Args:
             name: String. It is name of the template.
             locations: List of strings. Names of all locations.
-            ta: Multi digraph represented with networkx's MultiDiGraph. It is the graphical structure of the TA template.
+            ta: Multi digraph represented with graph.Graph. It is the graphical structure of the TA template.
             clocks: List of clock objects. Clocks used in the TA.
             clock_count: Integer. Number of clocks.
         """
@@ -36,12 +185,15 @@ class Template(object):
         interface.create_template(name, locations)
         self.name = name
         self.locations = locations + ["LOCATION_ZERO"]
-        self.ta = ta
+        self.ta = ta if ta is not None else Graph()
         self.ta.add_nodes_from(locations)
         self.clocks = clocks if clocks else []
         self.clock_count = clock_count
         self.initial_location = initial_location
         self.committed_location_count = 0
+        self.shared_spec_clock_count = 0
+        self.folded_spec_clock_count = 0
+        self.budget_exceeded = None
         self.ta.add_edge("LOCATION_ZERO", initial_location, -1)
 
     def get_locations(self):
@@ -57,7 +209,99 @@ class Template(object):
         Returns:
             List of transitions.
         """
-        return list(self.ta.edges(keys=True))
+        return self.ta.edges()
+
+    def get_synchronisation(self, t_id):
+        """
+        Returns:
+            Synchronisation of the transition with the given id.
+        """
+        return interface.get_synchronisation(self.name, t_id)
+
+    def remove(self, locations, t_ids):
+        """
+        Removes the given locations and transitions before the completion of the
+        template together with the constraints of the clocks on them. The clocks of
+        the model that are not checked anymore are removed as well.
+
+        Args:
+            locations: Set of location names.
+            t_ids: Set of transition ids. Transitions from or to a removed location
+                   must be among them.
+        Returns:
+            List of the names of the removed clocks.
+        """
+        ta = Graph()
+        ta.add_nodes_from([l for l in self.ta.names if l not in locations])
+        for t in self.ta.edges():
+            if t[2] not in t_ids:
+                ta.add_edge(t[0], t[1], t[2])
+        self.ta = ta
+        self.locations = [l for l in self.locations if l not in locations]
+        interface.remove_transitions(self.name, t_ids)
+        interface.remove_locations(self.name, locations)
+        removed_clocks = []
+        for c in list(self.clocks):
+            for t in list(c.guards.keys()):
+                if t[2] in t_ids:
+                    del c.guards[t]
+            for l in list(c.invariants.keys()):
+                if l in locations:
+                    del c.invariants[l]
+            if not c.is_spec_clock and not c.guards and not c.invariants:
+                self.clocks.remove(c)
+                removed_clocks.append(c.name)
+        return removed_clocks
+
+    def to_networkx(self):
+        """
+        Returns:
+            The graphical structure of the TA template as a networkx MultiDiGraph.
+        """
+        return self.ta.to_networkx()
+
+    def to_dict(self):
+        """
+        Describes the template before its completion with JSON compatible
+        types so that it can be restored later by from_dict.
+
+        Returns:
+            Dictionary of the locations, transitions, and clocks of the template.
+        """
+        return {
+            "name": self.name,
+            "locations": self.locations,
+            "initial_location": self.initial_location,
+            "committed_location_count": self.committed_location_count,
+            "clock_count": self.clock_count,
+            "transitions": [list(t) for t in interface.get_transitions(self.name)],
+            "clocks": [c.to_dict() for c in self.clocks]
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Restores a template described by to_dict.
+
+        Args:
+            d: Dictionary returned by to_dict.
+        Returns:
+            template: The restored template.
+        """
+        locations = [str(l) for l in d["locations"]]
+        n = locations.index("LOCATION_ZERO")
+        template = cls(str(d["name"]), locations[:n], str(d["initial_location"]))
+        for l in locations[n + 1:]:
+            interface.create_committed_location(template.name, l)
+            template.locations.append(l)
+        template.committed_location_count = d["committed_location_count"]
+        template.clock_count = d["clock_count"]
+        for (source, target, synch) in d["transitions"]:
+            t_id = interface.create_transition(template.name, str(source), str(target), str(synch))
+            template.ta.add_edge(str(source), str(target), t_id)
+        for c in d["clocks"]:
+            template.add_clock(Clock.from_dict(c))
+        return template
 
     def create_transition(self, transition, receive_synch="", send_synch=""):
         """
@@ -146,27 +390,27 @@ class Template(object):
         Ret:
             result: Matching list of transitions.
         """
-        transitions = self.get_transitions()
         result = []
         if transition[0] and transition[1]:
-            for t in transitions:
-                if transition[0] == t[0] and transition[1] == t[1]:
+            for t in self.ta.out_edges(transition[0]):
+                if transition[1] == t[1]:
                     result.append(t)
-                #elif transition[0] == t[0] and "Committed" in t[1]:
-                elif transition[0] == t[0]:
-                    for tt in transitions:
-                        if t[1] == tt[0] and transition[1] == tt[1]:
+                #elif "Committed" in t[1]:
+                else:
+                    for tt in self.ta.out_edges(t[1]):
+                        if transition[1] == tt[1]:
                             result.append(t)
         elif transition[0]:
-            result = filter(lambda x: x[0] == transition[0], transitions)
+            result = self.ta.out_edges(transition[0])
         elif transition[1]:
+            transitions = self.get_transitions()
             for t in transitions:
                 #if "Committed" not in t[0] and transition[1] == t[1]:
                 if transition[1] == t[1]:
                     result.append(t)
         else:
             #result = filter(lambda x: "Committed" not in x[0], transitions)
-            result = transitions
+            result = self.get_transitions()
         return result
 
     def create_clock(self, guard_info=(), invariant_info=(), assignment_info=[], is_spec_clock=False):
@@ -183,6 +427,9 @@ class Template(object):
                             invariant will appear and the second element is the constraint string.                           
             assignment_info: [(source, target)].
                              Transition on which the created clock will be reset.
+            is_spec_clock: Whether the clock is used only by the queries. Such clocks
+                           are shared by all queries observing the same resets when
+                           the template is reduced.
         """
         clock = Clock(name=self.get_clock_name(), is_spec_clock=is_spec_clock)
         assignment_info.append(("LOCATION_ZERO", self.initial_location))
@@ -219,11 +466,38 @@ class Template(object):
             del c.assignments
             c.assignments = new_assignment_list
 
-    def complete_template(self):
+    def complete_template(self, reduce_spec_clocks=False, budget=None):
         """
         Runs the clock reduction algortihm and makes necessary adjustments
         to comlete the TA tempalate.
 
+        Args:
+            reduce_spec_clocks: Whether specification clocks are replaced by the
+                                clocks of the template where possible.
+            budget: Budget of the reduction, or None.
+        Ret:
+            clock_mapping: Final clock mapping after clock reduction.
+        """
+        clock_mapping = self.reduce(reduce_spec_clocks, budget)
+        self.emit()
+        return clock_mapping
+
+    def reduce(self, reduce_spec_clocks=False, budget=None):
+        """
+        Runs the clock reduction algortihm. Only the template itself is read and
+        modified, so templates can be reduced in other processes.
+
+        If the budget is exceeded, the reduction stops and budget_exceeded tells
+        why. Every step of the reduction keeps the model equivalent, so the clocks
+        are then left as they were before the step that exceeded the budget: as
+        they were after removing the unnecessary resets if reducing the clocks
+        exceeded it, or with the resets of the clocks not yet visited if removing
+        the unnecessary resets did.
+
+        Args:
+            reduce_spec_clocks: Whether specification clocks are replaced by the
+                                clocks of the template where possible.
+            budget: Budget, or None.
         Ret:
             clock_mapping: Final clock mapping after clock reduction.
         """
@@ -231,15 +505,44 @@ class Template(object):
         for c in self.clocks:
             clock_mapping[c.name] = [c.name]
         self.finalize_transitions()
-        spec_clocks = filter(lambda x: x.is_spec_clock, self.clocks)
-        not_spec_clocks = filter(lambda x: not x.is_spec_clock, self.clocks)
+        spec_clocks = self.share_spec_clocks([x for x in self.clocks if x.is_spec_clock], clock_mapping)
+        not_spec_clocks = [x for x in self.clocks if not x.is_spec_clock]
         self.clocks = not_spec_clocks
-        self.remove_unnecessary_resets()
-        if len(self.clocks) > 1:
-            self.reduce_clocks(clock_mapping)
-        self.clocks += spec_clocks
+        self.budget_exceeded = None
+        if budget is not None:
+            budget.restart()
+        self.ta.budget = budget
+        try:
+            try:
+                self.remove_unnecessary_resets()
+            except BudgetExceeded as e:
+                self.budget_exceeded = str(e) + " while removing unnecessary resets"
+            if len(self.clocks) > 1 and not self.budget_exceeded:
+                # Clocks are merged in place, hence the copy.
+                snapshot = copy.deepcopy((self.clocks, clock_mapping, self.clock_count)) if budget is not None else None
+                try:
+                    self.reduce_clocks(clock_mapping)
+                except BudgetExceeded as e:
+                    (self.clocks, clock_mapping, self.clock_count) = snapshot
+                    self.budget_exceeded = str(e) + " while reducing clocks"
+        finally:
+            self.ta.budget = None
+        if reduce_spec_clocks:
+            self.fold_spec_clocks(spec_clocks, clock_mapping)
+        else:
+            self.clocks += spec_clocks
         for c in self.clocks:
             c.assignments = list(set(c.assignments))
+        for c in clock_mapping.keys():
+            clock_mapping[c] = list(set(clock_mapping[c]))
+        return clock_mapping
+
+    def emit(self):
+        """
+        Adds the guards, invariants, and resets of the reduced clocks to the
+        TA template and the template to the model.
+        """
+        for c in self.clocks:
             for t in c.guards.keys():
                 interface.add_guard(self.name, t[2], c.name, c.guards[t])
             for l in c.invariants.keys():
@@ -247,9 +550,6 @@ class Template(object):
             for t in c.assignments:
                 interface.add_assignment(self.name, t[2], c.name)
         interface.add_current_template_to_nta(self.name)
-        for c in clock_mapping.keys():
-            clock_mapping[c] = list(set(clock_mapping[c]))
-        return clock_mapping
 
     def create_committed_location(self):
         """
@@ -284,15 +584,70 @@ class Template(object):
             clock_mapping: Mappings of the clocks for reduction.
         """
         self.split(clock_mapping)
-        dependency_graph = self.generate_dependency_graph()
-        coloring = nx.coloring.greedy_color(dependency_graph, strategy=nx.coloring.strategy_largest_first)
+        clocks = list(self.clocks)
+        coloring = greedy_color(clocks, self.generate_dependency_graph())
         for i in range(max(coloring.values()) + 1):
             partition = []
-            for j in coloring.keys():
+            for j in clocks:
                 if i == coloring[j]:
                     partition.append(j)
             self.merge_clocks(partition, clock_mapping)
 
+    def share_spec_clocks(self, spec_clocks, clock_mapping):
+        """
+        Replaces the specification clocks that are reset on the same transitions
+        as an earlier one, and checked by no guard or invariant, by the earlier
+        one. The transitions must be finalized, so that resets given by different
+        abstract transitions, e.g., (l, "") and ("", l'), are the same if they
+        stand for the same transitions.
+
+        Args:
+            spec_clocks: Specification clocks of the template.
+            clock_mapping: Mappings of the clocks for reduction.
+        Returns:
+            List of the specification clocks that are kept.
+        """
+        self.shared_spec_clock_count = 0
+        shared = {}
+        kept = []
+        for c in spec_clocks:
+            if c.guards or c.invariants:
+                kept.append(c)
+                continue
+            key = spec_clock_key(c.assignments)
+            if key in shared:
+                clock_mapping[c.name] = [shared[key]]
+                self.shared_spec_clock_count += 1
+            else:
+                shared[key] = c.name
+                kept.append(c)
+        return kept
+
+    def fold_spec_clocks(self, spec_clocks, clock_mapping):
+        """
+        Replaces each specification clock by a clock of the template that is reset
+        on exactly the same transitions, if there is one. Such clocks have the same
+        value in every state, so a query may read either of them. Resets on the
+        initial transition are ignored since all clocks start from zero.
+
+        Args:
+            spec_clocks: Specification clocks of the template.
+            clock_mapping: Mappings of the clocks for reduction.
+        """
+        resets = {}
+        for c in self.clocks + spec_clocks:
+            key = frozenset(t for t in c.assignments if t[0] != "LOCATION_ZERO")
+            if key not in resets:
+                resets[key] = c.name
+                if c.is_spec_clock:
+                    self.clocks.append(c)
+            elif c.is_spec_clock:
+                # Also the clocks shared with this one.
+                for x in clock_mapping.keys():
+                    if clock_mapping[x] == [c.name]:
+                        clock_mapping[x] = [resets[key]]
+                self.folded_spec_clock_count += 1
+
     def remove_unnecessary_resets(self):
         """
         Removes unnecessary resets, i.e., resets from which no constraint is reachable
@@ -300,10 +655,10 @@ class Template(object):
         """
         for c in self.clocks:
             new_assignment_list = []
-            control_locations = [t[0] for t in c.guards.keys()] + c.invariants.keys()
+            control_locations = self.control_locations(c)
             for t_r in c.assignments:
                 necessary = False
-                reachable_control_locations = filter(lambda x: self.all_simple_paths(t_r[1], x) != [] or t_r[1] == x, control_locations)
+                reachable_control_locations = filter(lambda x: self.is_reachable(t_r[1], x), control_locations)
                 for l_c in reachable_control_locations:
                     necessary = self.is_reachable_without_resets(c, t_r[1], l_c)
                     if necessary:
@@ -324,7 +679,7 @@ class Template(object):
         for path in all_simple_paths:
             n = len(path)
             for i in range(n - 1):
-                not_necessary = (filter(lambda x: x[0] == path[i] and x[1] == path[i + 1], c.assignments) != [])
+                not_necessary = ([x for x in c.assignments if x[0] == path[i] and x[1] == path[i + 1]] != [])
                 if not_necessary:
                     break
             if not not_necessary:
@@ -351,10 +706,11 @@ class Template(object):
             for l in c.invariants.keys():
                 if self.is_reachable_without_resets(c, t_r[1], l):
                     temp.append(Clock(name=self.get_clock_name(), invariants={l: c.invariants[l]} , assignments=[t_r]))
+            masks = [self.dependency_masks(x) for x in temp]
             for i in range(len(temp)):
                 f = False
                 for j in range(i + 1, len(temp)):
-                    if self.is_dependent(temp[i], temp[j]):
+                    if self.are_masks_dependent(masks[i], masks[j]):
                         temp = [c]
                         f = True
                         break
@@ -362,7 +718,7 @@ class Template(object):
                     break
             if not temp:
                 temp = [c]
-            clock_mapping[c.name] = map(lambda x: x.name, temp)
+            clock_mapping[c.name] = [x.name for x in temp]
             new_clock_list.extend(temp)
         self.clocks = sorted(new_clock_list, key=lambda x: x.name)
         return
@@ -370,13 +726,17 @@ class Template(object):
     def generate_dependency_graph(self):
         """
         Generates dependency graph.
+
+        Ret:
+            dependency_graph: Dictionary. [clock : set of dependent clocks].
         """
-        dependency_graph = nx.Graph()
-        dependency_graph.add_nodes_from(self.clocks)
+        dependency_graph = dict((c, set()) for c in self.clocks)
+        masks = dict((c, self.dependency_masks(c)) for c in self.clocks)
         for c_1 in self.clocks:
             for c_2 in self.clocks:
-                if self.is_dependent(c_1, c_2):
-                    dependency_graph.add_edge(c_1, c_2)
+                if self.are_masks_dependent(masks[c_1], masks[c_2]):
+                    dependency_graph[c_1].add(c_2)
+                    dependency_graph[c_2].add(c_1)
         return dependency_graph
 
     def is_dependent(self, clock_1, clock_2):
@@ -387,25 +747,48 @@ class Template(object):
             clock_1: First clock.
             clock_2: Second clock.
         """
-        scope_1 = []
-        scope_2 = []
-        reset_locations_1 = [t[1] for t in clock_1.assignments]
-        reset_locations_2 = [t[1] for t in clock_2.assignments]
-        control_locations_1 = [t[0] for t in clock_1.guards.keys()] + clock_1.invariants.keys()
-        control_locations_2 = [t[0] for t in clock_2.guards.keys()] + clock_2.invariants.keys()
-        for t_r in clock_1.assignments:
-            for l_c in control_locations_1:
-                scope_1.extend(self.compute_scope(clock_1, t_r[1], l_c))
-        for t_r in clock_2.assignments:
-            for l_c in control_locations_2:
-                scope_2.extend(self.compute_scope(clock_2, t_r[1], l_c))
-        for path in scope_1:
-            if bool(set(path[1:]) & set(reset_locations_2)):
-                return True
-        for path in scope_2:
-            if bool(set(path[1:]) & set(reset_locations_1)):
-                return True
-        return False
+        return self.are_masks_dependent(self.dependency_masks(clock_1), self.dependency_masks(clock_2))
+
+    def are_masks_dependent(self, masks_1, masks_2):
+        """
+        Checks if two clocks are dependent given their dependency masks, i.e.,
+        if a reset location of one of them is in the scope of the other one.
+
+        Args:
+            masks_1: (scope_mask, reset_mask) of the first clock.
+            masks_2: (scope_mask, reset_mask) of the second clock.
+        """
+        return bool(masks_1[0] & masks_2[1] or masks_2[0] & masks_1[1])
+
+    def dependency_masks(self, c):
+        """
+        Computes the scope and the reset locations of a clock as bitmasks
+        over location ids. The scope mask contains every location but the
+        first one of the paths returned by compute_scope for all pairs of
+        reset and control locations.
+
+        Args:
+            c: Clock.
+        Ret:
+            (scope_mask, reset_mask)
+        """
+        ids = self.ta.ids
+        scope_mask = 0
+        reset_mask = 0
+        control_locations = [ids[l] for l in self.control_locations(c)]
+        for t_r in c.assignments:
+            reset_mask |= 1 << ids[t_r[1]]
+            for l_c in control_locations:
+                scope_mask |= self.ta.path_mask(ids[t_r[1]], l_c)
+        return scope_mask, reset_mask
+
+    def control_locations(self, c):
+        """
+        Returns:
+            List of locations in which the value of the given clock is checked,
+            i.e., sources of its guards and locations of its invariants.
+        """
+        return [t[0] for t in c.guards.keys()] + list(c.invariants.keys())
 
     def compute_scope(self, c, source, target):
         """
@@ -436,7 +819,7 @@ class Template(object):
         Returns:
             All simple paths between source and target.
         """
-        temp = list(nx.all_simple_paths(self.ta, source, target))
+        temp = list(self.ta.all_simple_paths(source, target))
         if source == target:
             temp.append([source])
         return temp
@@ -466,12 +849,14 @@ class Template(object):
             self.clocks.remove(c)
         new_clock = Clock(partition[0].name, guards=guards, invariants=invariants, assignments=assignments)
         self.clocks.append(new_clock)
-        temp = []
-        partition_names = map(lambda x: x.name, partition)
+        partition_names = [x.name for x in partition]
         for c in clock_mapping.keys():
+            # Each clock gets a list of its own, holding the merged clock once.
+            temp = []
             for c_s in clock_mapping[c]:
-                if (c_s in partition_names) and (new_clock.name not in clock_mapping[c]):
-                    temp.append(new_clock.name)
+                if c_s in partition_names:
+                    if new_clock.name not in temp:
+                        temp.append(new_clock.name)
                 else:
                     temp.append(c_s)
             clock_mapping[c] = temp
@@ -481,28 +866,26 @@ class Template(object):
         Prints clocks. Used for debugging.
         """
         for c in self.clocks:
-            print "Name: ", c.name
-            print "Guards: ", c.guards
-            print "Invariants: ", c.invariants
-            print "Assignments: ", c.assignments
+            print("Name: ", c.name)
+            print("Guards: ", c.guards)
+            print("Invariants: ", c.invariants)
+            print("Assignments: ", c.assignments)
 
     def print_dependency_graph(self):
         """
         Prints dependency graph. Used for debugging.
         """
-        print map(lambda x: x.name, self.clocks)
+        print([x.name for x in self.clocks])
         for x in self.clocks:
             for y in self.clocks:
                 if self.is_dependent(x, y):
-                    print x.name + "-" + y.name
+                    print(x.name + "-" + y.name)
 
     def is_reachable(self, l1, l2):
         """
         Checks if l2 is reachable from l1.
         """
-        if self.all_simple_paths(l1, l2):
-            return True
-        return False
+        return l1 == l2 or self.ta.has_path(l1, l2)
 
     def locations_along_paths(self, l1, l2):
         """
@@ -520,6 +903,8 @@ class Clock(object):
     """
     Clock object definition. Used by the Template object.
     """
+    __slots__ = ("name", "guards", "invariants", "assignments", "is_spec_clock")
+
     def __init__(self, name="", guards={}, invariants={}, assignments=[], is_spec_clock=False):
         """
         Initializes the object.
@@ -536,6 +921,35 @@ class Clock(object):
         self.assignments = assignments if assignments else [] # [(s, t, t_id)]
         self.is_spec_clock = is_spec_clock
 
+    def to_dict(self):
+        """
+        Returns:
+            Dictionary describing the clock with JSON compatible types.
+        """
+        return {
+            "name": self.name,
+            "guards": [list(t) + [self.guards[t]] for t in self.guards.keys()],
+            "invariants": [[l, self.invariants[l]] for l in self.invariants.keys()],
+            "assignments": [list(t) for t in self.assignments],
+            "is_spec_clock": self.is_spec_clock
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Creates a clock described by to_dict.
+
+        Args:
+            d: Dictionary returned by to_dict.
+        """
+        clock = cls(name=str(d["name"]), is_spec_clock=d["is_spec_clock"])
+        for g in d["guards"]:
+            clock.guards[(str(g[0]), str(g[1]), g[2])] = [str(cond) for cond in g[3]]
+        for (l, cond) in d["invariants"]:
+            clock.invariants[str(l)] = str(cond)
+        clock.assignments = [tuple(str(l) for l in t[:2]) + tuple(t[2:]) for t in d["assignments"]]
+        return clock
+
     def add_guard(self, transition, condition):
         """
         Adds given guard info to the clock.
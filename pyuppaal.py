@@ -19,12 +19,20 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <http://www.gnu.org/licenses/>. """
 
-import cgi
-import xml.etree.cElementTree as ElementTree
+import hashlib
+import json
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+from xml.sax.saxutils import escape
 import subprocess
 import re
 import tempfile, os
 import math
+import signal
+import threading
+import time
 
 def require_keyword_args(num_unnamed):
     """Decorator s.t. a function's named arguments cannot be used unnamed"""
@@ -38,6 +46,21 @@ def require_keyword_args(num_unnamed):
     return real_decorator
 
 UPPAAL_LINEHEIGHT = 15
+NUMPY_MIN_COORDS = 256
+
+_numpy = None
+def import_numpy():
+    """Returns the numpy module, or False if it is not installed. NumPy is
+    imported the first time it is needed since it is rarely worth its import time."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
 class NTA:
     def __init__(self, declaration="", system="", templates=None):
         self.declaration = declaration
@@ -61,7 +84,7 @@ class NTA:
   <declaration>%s</declaration>
   %s
   <system>%s</system>
-</nta>""" % (cgi.escape(self.declaration), templatesxml, cgi.escape(self.system))
+</nta>""" % (escape(self.declaration), templatesxml, escape(self.system))
     @classmethod
     def from_xml(cls, xmlsock):
         nta = cls()
@@ -69,90 +92,126 @@ class NTA:
         return nta
 
     def _from_xml(self, xmlsock):
-        xmldoc = ElementTree.ElementTree(file=xmlsock).getroot()
-
-        def int_or_none(text):
-            if text != None:
-                return int(text)
-            return None
-
-        #ntaxml = xmldoc.getElementsByTagName("nta")[0]
-        ntaxml = xmldoc
-        self.declaration = ntaxml.findtext('declaration') or ""
-        self.system = ntaxml.findtext('system') or ""
+        """Streams the document with iterparse. Each template is built as soon
+        as its element is complete and the element is then discarded, so only
+        one template's element tree is held in memory at a time."""
+        self.declaration = ""
+        self.system = ""
         self.templates = []
-        for templatexml in ntaxml.getiterator("template"):
-            locations = {}
-            for locationxml in templatexml.getiterator("location"):
-                name = locationxml.findtext("name")
-                location = Location(id=locationxml.get('id'),
-                    xpos=int(locationxml.get('x', 0)),
-                    ypos=int(locationxml.get('y', 0)), name=name)
-                namexml = locationxml.find('name')
-                if namexml != None:
-                    (location.name.xpos, location.name.ypos) = \
-                        (int_or_none(namexml.get('x', None)),
-                        int_or_none(namexml.get('y', None))
-                        )
-                if locationxml.find("committed") != None:
+        path = []
+        root = None
+        for (event, elem) in ElementTree.iterparse(xmlsock, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                path.append(elem.tag)
+                continue
+            path.pop()
+            if len(path) != 1:
+                continue
+            if elem.tag == 'declaration':
+                self.declaration = elem.text or ""
+            elif elem.tag == 'system':
+                self.system = elem.text or ""
+            elif elem.tag == 'template':
+                self.templates += [_template_from_xml(elem)]
+            elem.clear()
+            root.remove(elem)
+
+def _int_or_none(text):
+    if text != None:
+        return int(text)
+    return None
+
+def _label_from_xml(label, labelxml):
+    label.value = labelxml.text
+    label.xpos = _int_or_none(labelxml.get('x', None))
+    label.ypos = _int_or_none(labelxml.get('y', None))
+    return label
+
+def _template_from_xml(templatexml):
+    """Builds a Template from a complete template element, visiting the
+    children of each location and transition once."""
+    locations = {}
+    locationlist = []
+    branchpoints = []
+    transitions = []
+    name = declaration = parameter = initref = None
+    for childxml in templatexml:
+        tag = childxml.tag
+        if tag == 'location':
+            location = Location(id=childxml.get('id'),
+                xpos=int(childxml.get('x', 0)),
+                ypos=int(childxml.get('y', 0)))
+            for subxml in childxml:
+                if subxml.tag == 'name':
+                    location.name = Label("name", subxml.text,
+                        _int_or_none(subxml.get('x', None)),
+                        _int_or_none(subxml.get('y', None)))
+                elif subxml.tag == 'committed':
                     location.committed = True
-                if locationxml.find("urgent") != None:
+                elif subxml.tag == 'urgent':
                     location.urgent = True
-                for labelxml in locationxml.getiterator("label"):
-                    if labelxml.get('kind') == 'invariant':
-                        location.invariant = Label("invariant", labelxml.text)
-                        location.invariant.xpos = int_or_none(labelxml.get('x', None))
-                        location.invariant.ypos = int_or_none(labelxml.get('y', None))
-                    elif labelxml.get('kind') == 'exponentialrate':
-                        location.exprate = Label("exponentialrate", labelxml.text)
-                        location.exprate.xpos = int_or_none(labelxml.get('x', None))
-                        location.exprate.ypos = int_or_none(labelxml.get('y', None))
+                elif subxml.tag == 'label':
+                    if subxml.get('kind') == 'invariant':
+                        location.invariant = _label_from_xml(Label("invariant"), subxml)
+                    elif subxml.get('kind') == 'exponentialrate':
+                        location.exprate = _label_from_xml(Label("exponentialrate"), subxml)
                     #TODO other labels
-                locations[location.id] = location
-            for branchpointxml in templatexml.getiterator("branchpoint"):
-                branchpoint = Branchpoint(id=branchpointxml.get('id'),
-                    xpos=int_or_none(branchpointxml.get('x', None)),
-                    ypos=int_or_none(branchpointxml.get('y', None)))
-                locations[branchpoint.id] = branchpoint
-            transitions = []
-            for transitionxml in templatexml.getiterator("transition"):
-                transition = Transition(
-                    locations[transitionxml.find('source').get('ref')],
-                    locations[transitionxml.find('target').get('ref')],
-                    )            
-                transition.controllable = ('controllable', 'false') not in transitionxml.items()
-                if 'action' in transitionxml.keys():
-                    l = [s[1] for s in transitionxml.items() if s[0] == 'action']
-                    transition.action = l[0]
-                else:
-                    transition.action = None
-                for labelxml in transitionxml.getiterator("label"):
-                    if labelxml.get('kind') in ['select', 'guard', 'assignment', 
-                                                'synchronisation']:
-                        label = getattr(transition, labelxml.get('kind'))
-                        label.value = labelxml.text
-                        label.xpos = int_or_none(labelxml.get('x', None))
-                        label.ypos = int_or_none(labelxml.get('y', None))
-                for nailxml in transitionxml.getiterator("nail"):
-                    transition.nails += [
-                        Nail(int_or_none(nailxml.get('x', None)), 
-                            int_or_none(nailxml.get('y', None)))]
-                transitions += [transition]
-
-            declaration = templatexml.findtext("declaration") or ""
-            parameter = templatexml.findtext("parameter") or ""
-
-            if templatexml.find("init") != None:
-                initlocation=locations[templatexml.find("init").get('ref')]
-            else:
-                initlocation = None
-            template = Template(templatexml.find("name").text,
-                declaration,
-                locations.values(),
-                initlocation=initlocation,
-                transitions=transitions,
-                parameter=parameter)
-            self.templates += [template]    
+            locations[location.id] = location
+            locationlist += [location]
+        elif tag == 'branchpoint':
+            branchpoint = Branchpoint(id=childxml.get('id'),
+                xpos=_int_or_none(childxml.get('x', None)),
+                ypos=_int_or_none(childxml.get('y', None)))
+            locations[branchpoint.id] = branchpoint
+            branchpoints += [branchpoint]
+        elif tag == 'transition':
+            transitions += [childxml]
+        elif tag == 'name':
+            name = childxml.text
+        elif tag == 'declaration':
+            declaration = childxml.text
+        elif tag == 'parameter':
+            parameter = childxml.text
+        elif tag == 'init':
+            initref = childxml.get('ref')
+
+    for i in range(len(transitions)):
+        transitionxml = transitions[i]
+        source = target = None
+        labels = []
+        nails = []
+        for subxml in transitionxml:
+            if subxml.tag == 'source':
+                source = locations[subxml.get('ref')]
+            elif subxml.tag == 'target':
+                target = locations[subxml.get('ref')]
+            elif subxml.tag == 'label':
+                labels += [subxml]
+            elif subxml.tag == 'nail':
+                nails += [Nail(_int_or_none(subxml.get('x', None)),
+                    _int_or_none(subxml.get('y', None)))]
+        transition = Transition(source, target)
+        transition.controllable = transitionxml.get('controllable') != 'false'
+        transition.action = transitionxml.get('action')
+        for labelxml in labels:
+            if labelxml.get('kind') in ['select', 'guard', 'assignment',
+                                        'synchronisation']:
+                _label_from_xml(getattr(transition, labelxml.get('kind')), labelxml)
+        transition.nails = nails
+        transitions[i] = transition
+
+    if initref != None:
+        initlocation = locations[initref]
+    else:
+        initlocation = None
+    return Template(name,
+        declaration or "",
+        locationlist + branchpoints,
+        initlocation=initlocation,
+        transitions=transitions,
+        parameter=parameter or "")
 
 class Template:
     def __init__(self, name, declaration="", locations=None, initlocation=None, transitions=None, parameter=None):
@@ -170,9 +229,47 @@ class Template:
             l.id = 'id' + str(i)
             i = i + 1
 
+    def structure_hash(self):
+        """Returns a hash of the locations, transitions and labels of the template
+        in the order they are given to dot, i.e., of everything its layout depends on."""
+        index = dict((id(l), i) for (i, l) in enumerate(self.locations))
+        parts = [str(self.name), str(index.get(id(self.initlocation)))]
+        for l in self.locations:
+            parts += ['location', l.name.get_value(), l.invariant.get_value(),
+                str(bool(l.committed)), str(bool(l.urgent))]
+        for t in self.transitions:
+            parts += ['transition', str(index[id(t.source)]), str(index[id(t.target)])]
+            parts += [getattr(t, a).get_value() for a in ['select', 'guard', 'synchronisation', 'assignment']]
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update((part if isinstance(part, bytes) else part.encode('utf-8')) + b'\0')
+        return digest.hexdigest()
+
+    def copy_layout(self, other):
+        """Lays out the template as other, a template with the same structure_hash,
+        e.g., one loaded from an earlier model, by copying its coordinates."""
+        self.assign_ids()
+        for (l, o) in zip(self.locations, other.locations):
+            (l.xpos, l.ypos) = (o.xpos, o.ypos)
+            for a in ['name', 'invariant']:
+                (getattr(l, a).xpos, getattr(l, a).ypos) = (getattr(o, a).xpos, getattr(o, a).ypos)
+        for (t, o) in zip(self.transitions, other.transitions):
+            t.nails = [Nail(n.xpos, n.ypos) for n in o.nails]
+            for a in ['select', 'guard', 'synchronisation', 'assignment']:
+                (getattr(t, a).xpos, getattr(t, a).ypos) = (getattr(o, a).xpos, getattr(o, a).ypos)
+
     def dot2uppaalcoord(self, coord):
         return int(-float(coord)*1.5)
 
+    def dot2uppaalcoords(self, coords):
+        """Maps a list of dot coordinates as dot2uppaalcoord does, with NumPy
+        if it is installed and the list is long enough to benefit from it."""
+        numpy = len(coords) >= NUMPY_MIN_COORDS and import_numpy()
+        if not numpy:
+            return [int(-float(coord)*1.5) for coord in coords]
+        #astype truncates towards zero like int
+        return (-numpy.array(coords, dtype=float)*1.5).astype(int).tolist()
+
     def get_location_by_name(self, name):
         locs = [l for l in self.locations if l.name.value == name]
         assert len(locs) == 1
@@ -211,10 +308,12 @@ class Template:
                 curnode = nextnode
         G.layout(prog='dot')
 
+        #collect the coordinates of the template, which are mapped at once
+        coords = []
         for l in self.locations:
-            (l.xpos, l.ypos) = map(self.dot2uppaalcoord, G.get_node(l.id).attr['pos'].split(','))
-            (l.name.xpos, l.name.ypos) = (l.xpos, l.ypos + UPPAAL_LINEHEIGHT)
-            (l.invariant.xpos, l.invariant.ypos) = (l.xpos, l.ypos + 2 * UPPAAL_LINEHEIGHT)
+            (xpos, ypos) = G.get_node(l.id).attr['pos'].split(',')
+            coords += [xpos, ypos]
+        edges = []
         for t in self.transitions:
             #for nail in t.nails:
             #    nailnode = G.get_node(nail.id)
@@ -223,25 +322,40 @@ class Template:
 
             #first segment
             edge = G.get_edge(t.source.id, (t.nails + [t.target])[0].id, key=t.id)
+            nailcount = 0
             if auto_nails:
-                t.nails = []
                 for nailpos in edge.attr['pos'].split(" "):
-                    xpos, ypos = map(self.dot2uppaalcoord, nailpos.split(","))
-                    t.nails += [Nail(xpos, ypos)]
+                    (xpos, ypos) = nailpos.split(",")
+                    coords += [xpos, ypos]
+                    nailcount += 1
+            labels = [getattr(t, a) for a in ['select', 'guard', 'synchronisation', 'assignment']]
+            labels = [label for label in labels if label.get_value() != None]
+            if labels:
+                (x, y) = edge.attr['lp'].split(',')
+                coords += [x, y]
+            edges += [(t, nailcount, labels)]
+        coords = iter(self.dot2uppaalcoords(coords))
+
+        for l in self.locations:
+            (l.xpos, l.ypos) = (next(coords), next(coords))
+            (l.name.xpos, l.name.ypos) = (l.xpos, l.ypos + UPPAAL_LINEHEIGHT)
+            (l.invariant.xpos, l.invariant.ypos) = (l.xpos, l.ypos + 2 * UPPAAL_LINEHEIGHT)
+        for (t, nailcount, labels) in edges:
+            if auto_nails:
+                t.nails = [Nail(next(coords), next(coords)) for i in range(nailcount)]
+            if labels:
+                (x, y) = (next(coords), next(coords))
             ydelta = 0
-            for a in ['select', 'guard', 'synchronisation', 'assignment']:
-                label = getattr(t, a)
-                if label.get_value() != None:
-                    (x, y) = map(self.dot2uppaalcoord, edge.attr['lp'].split(','))
-                    label.xpos = x
-                    label.ypos = y+ydelta
-                    ydelta += UPPAAL_LINEHEIGHT
+            for label in labels:
+                label.xpos = x
+                label.ypos = y+ydelta
+                ydelta += UPPAAL_LINEHEIGHT
         self.sharpenTransitions(nailAngleThreshold, nailInterDistanceThreshold)
  
 
     def _parameter_to_xml(self):
         if self.parameter:
-            return '<parameter>%s</parameter>' % (cgi.escape(self.parameter))
+            return '<parameter>%s</parameter>' % (escape(self.parameter))
         return ""
 
     def to_xml(self):
@@ -255,13 +369,15 @@ class Template:
     %s
   </template>""" % (self.name, 
     self._parameter_to_xml(),
-    cgi.escape(self.declaration),
+    escape(self.declaration),
     "\n".join([l.to_xml() for l in self.locations if isinstance(l, Location)]),
     "\n".join([l.to_xml() for l in self.locations if isinstance(l, Branchpoint)]),
     self.initlocation.id,
     "\n".join([l.to_xml() for l in self.transitions]))
 
-class Label:
+class Label(object):
+    __slots__ = ('kind', 'value', 'xpos', 'ypos')
+
     def __init__(self, kind, value=None, xpos=None, ypos=None):
         self.kind = kind
         self.value = value
@@ -302,16 +418,19 @@ class Label:
             #special case for location names
             if self.kind == 'name':
                 return '<name %s>%s</name>' % \
-                    (" ".join(attrs[1:]), cgi.escape(self.value))
+                    (" ".join(attrs[1:]), escape(self.value))
             else:
                 return '<label %s>%s</label>' % \
-                    (" ".join(attrs), cgi.escape(self.value))
+                    (" ".join(attrs), escape(self.value))
         return ''
 
     def __str__(self):
         return self.get_value()
 
-class Location:
+class Location(object):
+    __slots__ = ('invariant', 'exprate', 'committed', 'urgent', 'name', 'id', 'oldid',
+        'xpos', 'ypos')
+
     @require_keyword_args(1)
     def __init__(self, invariant=None, urgent=False, committed=False, name=None, id = None,
         xpos=0, ypos=0):
@@ -366,7 +485,10 @@ class Branchpoint:
 
 
 last_transition_id = 0
-class Transition:
+class Transition(object):
+    __slots__ = ('source', 'target', 'select', 'guard', 'synchronisation', 'assignment',
+        'nails', 'action', 'controllable', 'id')
+
     @require_keyword_args(3)
     def __init__(self, source, target, select='', guard='', synchronisation='',
                     assignment='', action = None, controllable=True):
@@ -393,37 +515,35 @@ class Transition:
         return newone
 
     def sharpen(self, angleThreshold, lengthThreshold):
-        count = 0
-        while True: # do while? 
-            removed = False
-            nail_to_pos = lambda nail: (nail.xpos, nail.ypos)
-
-            for (prev, curnail, next) in zip(
-                    [(self.source.xpos, self.source.ypos)] + map(nail_to_pos, self.nails[:-1]), 
-                    self.nails, 
-                    map(nail_to_pos, self.nails[1:]) + [(self.target.xpos, self.target.ypos)]
-                    ):
-                cur = nail_to_pos(curnail)
-                v1 = (prev[0]-cur[0], prev[1]-cur[1])
-                v2 = (next[0]-cur[0], next[1]-cur[1])
-                v1len = (math.sqrt((v1[0]*v1[0])+(v1[1]*v1[1])))
-                v2len = (math.sqrt((v2[0]*v2[0])+(v2[1]*v2[1])))
-                if v1len<lengthThreshold or v2len<lengthThreshold:
-                    self.nails.remove(curnail)
-                    count += 1
-                    removed=True
-                    break
-                dot = (v1[0] * v2[0] + v1[1] * v2[1])/(v1len*v2len)
-                #clamp input to between 1...-1
-                dot = max(-1.0, min(dot, 1.0))
-                angle = math.degrees(math.acos(dot))
-                if angle > angleThreshold:
-                    self.nails.remove(curnail)
-                    count += 1
-                    removed=True
-                    break
-            if not removed:
-                break
+        """Removes the nails that are too close to their neighbours or at which
+        the transition bends by more than angleThreshold degrees, in one pass.
+        Removing a nail only changes whether its neighbours are removed, so the
+        kept nails are a stack and only its top is checked again after a removal,
+        which removes the same nails in the same order as restarting the scan
+        from the first nail after every removal. Returns the number of removed nails."""
+        def removable(prev, cur, next):
+            v1 = (prev[0]-cur[0], prev[1]-cur[1])
+            v2 = (next[0]-cur[0], next[1]-cur[1])
+            v1len = (math.sqrt((v1[0]*v1[0])+(v1[1]*v1[1])))
+            v2len = (math.sqrt((v2[0]*v2[0])+(v2[1]*v2[1])))
+            if v1len<lengthThreshold or v2len<lengthThreshold:
+                return True
+            dot = (v1[0] * v2[0] + v1[1] * v2[1])/(v1len*v2len)
+            #clamp input to between 1...-1
+            dot = max(-1.0, min(dot, 1.0))
+            angle = math.degrees(math.acos(dot))
+            return angle > angleThreshold
+
+        source = (self.source.xpos, self.source.ypos)
+        kept = []
+        for next in self.nails + [self.target]:
+            nextpos = (next.xpos, next.ypos)
+            while kept and removable((kept[-2].xpos, kept[-2].ypos) if len(kept) > 1 else source,
+                    (kept[-1].xpos, kept[-1].ypos), nextpos):
+                kept.pop()
+            kept.append(next)
+        count = len(self.nails) + 1 - len(kept)
+        self.nails[:] = kept[:-1]
         return count
     def to_xml(self):
         if self.action is None:
@@ -455,7 +575,9 @@ class Transition:
             self.nails += [Nail()]
 
 last_nail_id = 0
-class Nail:
+class Nail(object):
+    __slots__ = ('id', 'xpos', 'ypos')
+
     def __init__(self, xpos=0, ypos=0):
         global last_nail_id
         self.id = 'Nail' + str(last_nail_id)
@@ -500,9 +622,54 @@ class QueryFile:
         file.close()
         os.unlink(path)
 
+class VerifytaOutput:
+    """Incremental parser of verifyta's output. Lines are fed as they are
+    read and callback(property, result, seconds) is called whenever the
+    result of a property is known."""
+    regex = re.compile('^Verifying property ([0-9]+) at line ')
+
+    def __init__(self, callback=None):
+        self.res = []
+        self.lastprop = None
+        self.sub = None
+        self.started = None
+        self.callback = callback
+
+    def add_result(self, prop, result):
+        self.res += [result]
+        if self.callback:
+            self.callback(prop, result, time.time() - self.started)
+
+    def feed(self, line):
+        match = self.regex.match(line)
+        if self.lastprop:
+            if line.endswith(' -- Property is satisfied.'):
+                self.add_result(self.lastprop, True)
+            elif line.endswith(' -- Property is NOT satisfied.'):
+                self.add_result(self.lastprop, False)
+            elif line.endswith(' -- Property MAY be satisfied.'):
+                self.add_result(self.lastprop, 'maybe')
+            else:
+                pass #Ignore garbage
+            self.lastprop = None
+        elif line.endswith('sup:'):
+            self.sub = 1
+        elif self.sub:
+            self.res[-1] = line
+            self.sub = None
+        elif match:
+            self.lastprop = int(match.group(1))
+            self.started = time.time()
+
 def verify(modelfilename, queryfilename, verifyta='verifyta',
             searchorder='bfs', statespacereduction='1', approximation='', getoutput=False,
-            remotehost=None, remotedir='/tmp/'):
+            remotehost=None, remotedir='/tmp/', callback=None, timeout=None):
+    """Runs verifyta on the model and query files and returns the list of
+    results of the properties. The output is parsed while verifyta runs:
+    callback(property, result, seconds) is called for every property as
+    soon as its result is printed, and if checking a property takes more
+    than timeout seconds verifyta is killed and the property's result is
+    'timeout'."""
     searchorder = { 'bfs': '0', #Breadth first
                     'dfs': '1', #Depth first
                     'rdfs': '2', #Random depth first
@@ -529,47 +696,242 @@ def verify(modelfilename, queryfilename, verifyta='verifyta',
         ' -q ' + modelfilename + ' ' + queryfilename
 
     #print 'Executing', cmdline
+    stderrfile = tempfile.TemporaryFile()
     proc = subprocess.Popen(
         cmdline, 
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
-    #TODO - report progress
-    (stdoutdata, stderrdata) = proc.communicate()
-
-    lines = stdoutdata.split('\n')
-    errlines = stderrdata.split('\n')
+        stdout=subprocess.PIPE, stderr=stderrfile, shell=True,
+        universal_newlines=True, preexec_fn=getattr(os, 'setsid', None))
+
+    output = VerifytaOutput(callback)
+    timedout = []
+    timer = None
+
+    def kill():
+        #The shell and everything it started are in the process group of proc
+        timedout.append(True)
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            proc.kill()
+
+    stdoutlines = []
+    for line in iter(proc.stdout.readline, ''):
+        if getoutput:
+            stdoutlines += [line]
+        lastprop = output.lastprop
+        output.feed(line.rstrip('\n'))
+        if timeout and output.lastprop != lastprop:
+            if timer:
+                timer.cancel()
+                timer = None
+            if output.lastprop:
+                timer = threading.Timer(timeout, kill)
+                timer.start()
+    if timer:
+        timer.cancel()
+    proc.wait()
+    if timedout and output.lastprop:
+        output.add_result(output.lastprop, 'timeout')
+
+    stderrfile.seek(0)
+    errlines = stderrfile.read().decode('utf-8', 'replace').split('\n')
+    stderrfile.close()
 
     #Look for tell-tale signs that something went wrong
     for line in errlines:
         if "Internet connection is required for activation." in line:
             raise Exception("UPPAAL verifyta error: " + line)
 
-    regex = re.compile('^Verifying property ([0-9]+) at line ')
-    res = []
-    lastprop = None
-    sub = None
-    for line in lines:
-        match = regex.match(line)
-        if lastprop:
-            if line.endswith(' -- Property is satisfied.'):
-                res += [True]
-            elif line.endswith(' -- Property is NOT satisfied.'):
-                res += [False]
-            elif line.endswith(' -- Property MAY be satisfied.'):
-                res += ['maybe']
-            else:
-                pass #Ignore garbage
-            lastprop = None
-        elif line.endswith('sup:'):
-            sub = 1
-        elif sub:
-            res[-1] = line
-            sub = None
-        elif match:
-            lastprop = int(match.group(1))
-
     if getoutput:
-        return (res, stdoutdata)
+        return (output.res, ''.join(stdoutlines))
+
+    return output.res
+
+def split_queries(queryfilename):
+    """Returns the properties of a query file, one per non-empty line, without comments"""
+    f = open(queryfilename)
+    text = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.S)
+    f.close()
+    queries = []
+    for line in text.split('\n'):
+        line = line.split('//')[0].strip()
+        if line:
+            queries += [line]
+    return queries
+
+def verify_parallel(modelfilename, queryfilename, verifyta='verifyta',
+            searchorder='bfs', statespacereduction='1', approximation='', getoutput=False,
+            remotehost=None, remotedir='/tmp/', callback=None, timeout=None, jobs=None):
+    """Like verify, but checks every property of the query file in its own
+    verifyta process, running at most jobs (default: number of CPUs) of
+    them at a time. Results are in the order of the query file; a property
+    verifyta gave no result for is None. callback is called from the worker
+    threads with the property's number in the query file."""
+    queries = split_queries(queryfilename)
+
+    def verify_query(index_query):
+        (index, query) = index_query
+        if callback:
+            query_callback = lambda prop, result, seconds: callback(index + 1, result, seconds)
+        else:
+            query_callback = None
+        (fileh, path) = tempfile.mkstemp(suffix='.q')
+        file = os.fdopen(fileh, 'w')
+        file.write(query + '\n')
+        file.close()
+        try:
+            return verify(modelfilename, path, verifyta=verifyta,
+                searchorder=searchorder, statespacereduction=statespacereduction,
+                approximation=approximation, getoutput=True,
+                remotehost=remotehost, remotedir=remotedir,
+                callback=query_callback, timeout=timeout)
+        finally:
+            os.unlink(path)
+
+    # Imported here since compiling a model never needs them.
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(min(jobs or multiprocessing.cpu_count(), max(len(queries), 1)))
+    try:
+        outputs = pool.map(verify_query, list(enumerate(queries)))
+    finally:
+        pool.close()
+        pool.join()
+
+    res = [r[0] if r else None for (r, stdoutdata) in outputs]
+    if getoutput:
+        return (res, ''.join([stdoutdata for (r, stdoutdata) in outputs]))
+    return res
+
+def model_hash(modelfilename):
+    """Returns a hash of the model that ignores its layout: coordinates,
+    nails and whitespace around text do not change the hash."""
+    digest = hashlib.sha256()
+    def update(elem):
+        if elem.tag == 'nail':
+            return
+        digest.update(('<' + elem.tag).encode('utf-8'))
+        for (key, value) in sorted(elem.attrib.items()):
+            if key not in ('x', 'y'):
+                digest.update((' %s=%r' % (key, value)).encode('utf-8'))
+        digest.update(('>' + (elem.text or '').strip()).encode('utf-8'))
+        for child in elem:
+            update(child)
+        digest.update(('</' + elem.tag + '>').encode('utf-8'))
+    update(ElementTree.parse(modelfilename).getroot())
+    return digest.hexdigest()
+
+class ResultCache:
+    """Verification results stored on disk, one file per property named
+    by the hash of the model, the property and the verifier options. The
+    least recently used results are removed when the files of the cache
+    take more than maxsize bytes."""
+    def __init__(self, cachedir=None, maxsize=64 * 1024 * 1024):
+        self.cachedir = cachedir or os.path.join(os.path.expanduser('~'), '.cache', 'pyuppaal')
+        self.maxsize = maxsize
+        if not os.path.isdir(self.cachedir):
+            os.makedirs(self.cachedir)
+
+    def key(self, modelhash, query, options):
+        digest = hashlib.sha256()
+        for part in [modelhash, query] + list(options):
+            digest.update((part + '\0').encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the stored result as a one element list, or None"""
+        path = os.path.join(self.cachedir, key)
+        try:
+            f = open(path)
+            try:
+                res = json.load(f)
+            finally:
+                f.close()
+            os.utime(path, None) #Most recently used
+        except (IOError, OSError, ValueError):
+            return None
+        return [res]
+
+    def put(self, key, result):
+        (fileh, path) = tempfile.mkstemp(dir=self.cachedir, suffix='.tmp')
+        file = os.fdopen(fileh, 'w')
+        json.dump(result, file)
+        file.close()
+        os.rename(path, os.path.join(self.cachedir, key))
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cachedir):
+            try:
+                stat = os.stat(os.path.join(self.cachedir, name))
+            except OSError:
+                continue
+            entries += [(stat.st_mtime, stat.st_size, name)]
+        size = sum([entry[1] for entry in entries])
+        for (mtime, entrysize, name) in sorted(entries):
+            if size <= self.maxsize:
+                break
+            try:
+                os.unlink(os.path.join(self.cachedir, name))
+            except OSError:
+                pass
+            size -= entrysize
+
+def verify_cached(modelfilename, queryfilename, verifyta='verifyta',
+            searchorder='bfs', statespacereduction='1', approximation='',
+            remotehost=None, remotedir='/tmp/', callback=None, timeout=None, jobs=None,
+            cache=None):
+    """Like verify, but takes the results of properties that were verified
+    before on the same model with the same options from cache (default:
+    a ResultCache in ~/.cache/pyuppaal). Only the remaining properties are
+    given to verifyta, with verify_parallel if jobs is given. Timeouts and
+    missing results are not stored."""
+    cache = cache or ResultCache()
+    queries = split_queries(queryfilename)
+    modelhash = model_hash(modelfilename)
+    options = [verifyta, searchorder, statespacereduction, approximation]
+    keys = [cache.key(modelhash, query, options) for query in queries]
+
+    res = [None] * len(queries)
+    missing = []
+    for (i, key) in enumerate(keys):
+        hit = cache.get(key)
+        if hit is None:
+            missing += [i]
+        else:
+            res[i] = hit[0]
+            if callback:
+                callback(i + 1, hit[0], 0.0)
+    if not missing:
+        return res
+
+    if callback:
+        missing_callback = lambda prop, result, seconds: callback(missing[prop - 1] + 1, result, seconds)
+    else:
+        missing_callback = None
+    (fileh, path) = tempfile.mkstemp(suffix='.q')
+    file = os.fdopen(fileh, 'w')
+    file.write(''.join([queries[i] + '\n' for i in missing]))
+    file.close()
+    try:
+        if jobs:
+            missingres = verify_parallel(modelfilename, path, verifyta=verifyta,
+                searchorder=searchorder, statespacereduction=statespacereduction,
+                approximation=approximation, remotehost=remotehost, remotedir=remotedir,
+                callback=missing_callback, timeout=timeout, jobs=jobs)
+        else:
+            missingres = verify(modelfilename, path, verifyta=verifyta,
+                searchorder=searchorder, statespacereduction=statespacereduction,
+                approximation=approximation, remotehost=remotehost, remotedir=remotedir,
+                callback=missing_callback, timeout=timeout)
+    finally:
+        os.unlink(path)
 
+    for (i, result) in zip(missing, missingres):
+        res[i] = result
+        if result is not None and result != 'timeout':
+            cache.put(keys[i], result)
+    cache.evict()
     return res
 
 # vim:ts=4:sw=4:expandtab
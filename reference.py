@@ -0,0 +1,369 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    Reference implementation of the clock reduction: the reduction of Template
+    and Clock of objects.py as it was before it was optimized, on a networkx
+    MultiDiGraph, copied without changes except that the results of filter,
+    map, and keys are made lists so that it runs on Python 3 as well, and that
+    nothing is added to the model. Simple paths are enumerated for every
+    question and the dependency graph is colored by networkx.
+
+    benchmarks/bench_reference.py reduces templates both ways and reports where
+    objects.Template differs from this one or either of them fails. Do not fix
+    this file; it is meant to show what the reduction did originally.
+"""
+
+import copy
+import networkx as nx
+
+def reduce(template):
+    """
+    Runs the reference clock reduction on the clocks of the given template,
+    which must not be reduced yet. The template itself is not modified.
+
+    Args:
+        template: objects.Template.
+    Returns:
+        Tuple of the list of the reduced clocks and the clock mapping.
+    """
+    ta = nx.MultiDiGraph()
+    ta.add_nodes_from(template.ta.names)
+    for (s, t, t_id) in template.ta.edges():
+        ta.add_edge(s, t, t_id)
+    clocks = [Clock(c.name, guards=copy.deepcopy(c.guards), invariants=copy.deepcopy(c.invariants),
+                    assignments=list(c.assignments), is_spec_clock=c.is_spec_clock) for c in template.clocks]
+    reference = Template(template.name, template.locations, template.initial_location, ta, clocks,
+                         template.clock_count)
+    clock_mapping = reference.complete_template()
+    return (reference.clocks, clock_mapping)
+
+class Template(object):
+    """
+    TA template that is described by the input.
+    """
+    def __init__(self, name, locations, initial_location, ta, clocks=[], clock_count=0):
+        """
+        Args:
+            name: String. It is name of the template.
+            locations: List of strings. Names of all locations.
+            ta: Multi digraph represented with networkx's MultiDiGraph. It is the graphical structure of the TA template.
+            clocks: List of clock objects. Clocks used in the TA.
+            clock_count: Integer. Number of clocks.
+        """
+        self.name = name
+        self.locations = list(locations)
+        self.ta = ta
+        self.clocks = clocks if clocks else []
+        self.clock_count = clock_count
+        self.initial_location = initial_location
+
+    def get_transitions(self):
+        """
+        Returns:
+            List of transitions.
+        """
+        return list(self.ta.edges(keys=True))
+
+    def find_transitions(self, transition):
+        """
+        Finds corresponding transitions for given source
+        target pair amoung created transitions.
+
+        Args:
+            transition: (source location, target location)
+
+        Ret:
+            result: Matching list of transitions.
+        """
+        transitions = self.get_transitions()
+        result = []
+        if transition[0] and transition[1]:
+            for t in transitions:
+                if transition[0] == t[0] and transition[1] == t[1]:
+                    result.append(t)
+                #elif transition[0] == t[0] and "Committed" in t[1]:
+                elif transition[0] == t[0]:
+                    for tt in transitions:
+                        if t[1] == tt[0] and transition[1] == tt[1]:
+                            result.append(t)
+        elif transition[0]:
+            result = list(filter(lambda x: x[0] == transition[0], transitions))
+        elif transition[1]:
+            for t in transitions:
+                #if "Committed" not in t[0] and transition[1] == t[1]:
+                if transition[1] == t[1]:
+                    result.append(t)
+        else:
+            #result = filter(lambda x: "Committed" not in x[0], transitions)
+            result = transitions
+        return result
+
+    def finalize_transitions(self):
+        """
+        Maps abstract transitions of assignments to real transitions.
+        """
+        for c in self.clocks:
+            new_assignment_list = []
+            for tt in c.assignments:
+                transitions = self.find_transitions(tt)
+                for t in transitions:
+                    new_assignment_list.append(t)
+            del c.assignments
+            c.assignments = new_assignment_list
+
+    def complete_template(self):
+        """
+        Runs the clock reduction algortihm.
+
+        Ret:
+            clock_mapping: Final clock mapping after clock reduction.
+        """
+        clock_mapping = {}
+        for c in self.clocks:
+            clock_mapping[c.name] = [c.name]
+        self.finalize_transitions()
+        spec_clocks = list(filter(lambda x: x.is_spec_clock, self.clocks))
+        not_spec_clocks = list(filter(lambda x: not x.is_spec_clock, self.clocks))
+        self.clocks = not_spec_clocks
+        self.remove_unnecessary_resets()
+        if len(self.clocks) > 1:
+            self.reduce_clocks(clock_mapping)
+        self.clocks += spec_clocks
+        for c in self.clocks:
+            c.assignments = list(set(c.assignments))
+        for c in clock_mapping.keys():
+            clock_mapping[c] = list(set(clock_mapping[c]))
+        return clock_mapping
+
+    def get_clock_name(self):
+        """
+        Gives an unused clock name.
+
+        Returns:
+            Next available clock name.
+        """
+        temp = "x_" + str(self.clock_count)
+        self.clock_count += 1
+        return temp
+
+    def reduce_clocks(self, clock_mapping):
+        """
+        Reduces number of clocks according to the reduction algorithm.
+
+        Args:
+            clock_mapping: Mappings of the clocks for reduction.
+        """
+        self.split(clock_mapping)
+        dependency_graph = self.generate_dependency_graph()
+        coloring = nx.coloring.greedy_color(dependency_graph, strategy=nx.coloring.strategy_largest_first)
+        for i in range(max(coloring.values()) + 1):
+            partition = []
+            for j in coloring.keys():
+                if i == coloring[j]:
+                    partition.append(j)
+            self.merge_clocks(partition, clock_mapping)
+
+    def remove_unnecessary_resets(self):
+        """
+        Removes unnecessary resets, i.e., resets from which no constraint is reachable
+        without passing trough another reset of the clock or there is no path in between.
+        """
+        for c in self.clocks:
+            new_assignment_list = []
+            control_locations = [t[0] for t in c.guards.keys()] + list(c.invariants.keys())
+            for t_r in c.assignments:
+                necessary = False
+                reachable_control_locations = list(filter(lambda x: self.all_simple_paths(t_r[1], x) != [] or t_r[1] == x, control_locations))
+                for l_c in reachable_control_locations:
+                    necessary = self.is_reachable_without_resets(c, t_r[1], l_c)
+                    if necessary:
+                        break
+                if necessary:
+                    new_assignment_list.append(t_r)
+            c.assignments = list(new_assignment_list)
+
+    def is_reachable_without_resets(self, c, source, target):
+        """
+        Checks if there is path between two locations on which the given
+        reset locations are not passed.
+        """
+        if source == target:
+            return True
+        all_simple_paths = self.all_simple_paths(source, target)
+        not_necessary = True
+        for path in all_simple_paths:
+            n = len(path)
+            for i in range(n - 1):
+                not_necessary = (list(filter(lambda x: x[0] == path[i] and x[1] == path[i + 1], c.assignments)) != [])
+                if not_necessary:
+                    break
+            if not not_necessary:
+                return True
+        return False
+
+    def split(self, clock_mapping):
+        """
+        Splits clocks of the TA template.
+
+        Args:
+            clock_mapping: Mappings of the clocks for reduction.
+        """
+        new_clock_list = []
+        for c in self.clocks:
+            if len(c.assignments) > 1:
+                new_clock_list.append(c)
+                continue
+            temp = []
+            t_r = c.assignments[0]
+            for t_c in c.guards.keys():
+                if self.is_reachable_without_resets(c, t_r[1], t_c[0]):
+                    temp.append(Clock(name=self.get_clock_name(), guards={t_c: c.guards[t_c]} , assignments=[t_r]))
+            for l in c.invariants.keys():
+                if self.is_reachable_without_resets(c, t_r[1], l):
+                    temp.append(Clock(name=self.get_clock_name(), invariants={l: c.invariants[l]} , assignments=[t_r]))
+            for i in range(len(temp)):
+                f = False
+                for j in range(i + 1, len(temp)):
+                    if self.is_dependent(temp[i], temp[j]):
+                        temp = [c]
+                        f = True
+                        break
+                if f:
+                    break
+            if not temp:
+                temp = [c]
+            clock_mapping[c.name] = list(map(lambda x: x.name, temp))
+            new_clock_list.extend(temp)
+        self.clocks = sorted(new_clock_list, key=lambda x: x.name)
+        return
+
+    def generate_dependency_graph(self):
+        """
+        Generates dependency graph.
+        """
+        dependency_graph = nx.Graph()
+        dependency_graph.add_nodes_from(self.clocks)
+        for c_1 in self.clocks:
+            for c_2 in self.clocks:
+                if self.is_dependent(c_1, c_2):
+                    dependency_graph.add_edge(c_1, c_2)
+        return dependency_graph
+
+    def is_dependent(self, clock_1, clock_2):
+        """
+        Checks if given clocks are dependent.
+
+        Args:
+            clock_1: First clock.
+            clock_2: Second clock.
+        """
+        scope_1 = []
+        scope_2 = []
+        reset_locations_1 = [t[1] for t in clock_1.assignments]
+        reset_locations_2 = [t[1] for t in clock_2.assignments]
+        control_locations_1 = [t[0] for t in clock_1.guards.keys()] + list(clock_1.invariants.keys())
+        control_locations_2 = [t[0] for t in clock_2.guards.keys()] + list(clock_2.invariants.keys())
+        for t_r in clock_1.assignments:
+            for l_c in control_locations_1:
+                scope_1.extend(self.compute_scope(clock_1, t_r[1], l_c))
+        for t_r in clock_2.assignments:
+            for l_c in control_locations_2:
+                scope_2.extend(self.compute_scope(clock_2, t_r[1], l_c))
+        for path in scope_1:
+            if bool(set(path[1:]) & set(reset_locations_2)):
+                return True
+        for path in scope_2:
+            if bool(set(path[1:]) & set(reset_locations_1)):
+                return True
+        return False
+
+    def compute_scope(self, c, source, target):
+        """
+        Computes scope of a clocks between given locations using given reset locations.
+
+        Args:
+            source: Starting location of the scope.
+            target: Ending location of the scope.
+            reset_locations: Reset locations of the clock under consideration.
+        """
+        all_simple_paths = self.all_simple_paths(source, target)
+        scope = []
+        not_necessary = True
+        for path in all_simple_paths:
+            n = len(path)
+            for i in range(n - 1):
+                not_necessary = (path[i], path[i + 1]) in c.assignments
+                if not_necessary:
+                    break
+            if not not_necessary:
+                scope.append(path)
+        return scope
+
+    def all_simple_paths(self, source, target):
+        """
+        Finds all simple paths between two locations.
+
+        Returns:
+            All simple paths between source and target.
+        """
+        temp = list(nx.all_simple_paths(self.ta, source, target))
+        if source == target:
+            temp.append([source])
+        return temp
+
+    def merge_clocks(self, partition, clock_mapping):
+        """
+        Merges given set of clocks into one. Pick the first clock from the list.
+
+        Args:
+            partition: Partititon of the set of clocks obtained from graph coloring.
+        """
+        guards = {}
+        invariants = {}
+        assignments = []
+        for c in partition:
+            assignments.extend(c.assignments)
+            for i in c.guards.keys():
+                if i in guards.keys():
+                    guards[i].extend(c.guards[i])
+                else:
+                    guards[i] = c.guards[i]
+            for i in c.invariants.keys():
+                if i in invariants.keys():
+                    invariants[i].extend(c.invariants[i])
+                else:
+                    invariants[i] = c.invariants[i]
+            self.clocks.remove(c)
+        new_clock = Clock(partition[0].name, guards=guards, invariants=invariants, assignments=assignments)
+        self.clocks.append(new_clock)
+        temp = []
+        partition_names = list(map(lambda x: x.name, partition))
+        for c in clock_mapping.keys():
+            for c_s in clock_mapping[c]:
+                if (c_s in partition_names) and (new_clock.name not in clock_mapping[c]):
+                    temp.append(new_clock.name)
+                else:
+                    temp.append(c_s)
+            clock_mapping[c] = temp
+
+class Clock(object):
+    """
+    Clock object definition. Used by the Template object.
+    """
+    def __init__(self, name="", guards={}, invariants={}, assignments=[], is_spec_clock=False):
+        """
+        Initializes the object.
+
+        Args:
+            name: String. Name of the clock.
+            guards: Dictionary. [(s, t, t_id) : condition_list].
+            invariants: Dictionary. [l : condition_list].
+            assignments: List. [(s, t, t_id)].
+        """
+        self.name = name
+        self.guards = guards if guards else {} # [(s, t, t_id) : condition_list]
+        self.invariants = invariants if invariants else {} # [l : condition_list]
+        self.assignments = assignments if assignments else [] # [(s, t, t_id)]
+        self.is_spec_clock = is_spec_clock
@@ -0,0 +1,322 @@
+"""
+    Written by Beyazit Yalcinkaya as a part of the
+    Automating Timed Automata Design Project conducted
+    by the METU Cyber-Physical Systems Research Group.
+
+    Random simulator of models generated by ATAC. Runs of bounded depth are
+    simulated with concrete clock values, binary synchronisation, committed
+    and urgent locations, guards, and invariants. It is meant to find obvious
+    modelling errors, e.g., deadlocks and locations that are never entered,
+    without running UPPAAL.
+"""
+
+import argparse
+import random
+import re
+import time
+import analysis
+import pyuppaal
+
+CONSTRAINT = re.compile(r"^\s*([A-Za-z_][\w.]*)\s*(<=|>=|==|<|>)\s*(-?\d+)\s*$")
+RESET = re.compile(r"^\s*([A-Za-z_][\w.]*)\s*:?=\s*(\d+)\s*$")
+INFINITY = float("inf")
+EPSILON = 1e-9
+
+class Edge(object):
+    """
+    Transition of a process with its constraints compiled to clock indices.
+    """
+    __slots__ = ("index", "source", "target", "guard", "resets", "channel", "send")
+
+class Process(object):
+    """
+    Instance of a template.
+    """
+    def __init__(self, name, template, clocks):
+        """
+        Compiles the template.
+
+        Args:
+            name: Name of the process.
+            template: pyuppaal.Template.
+            clocks: Dictionary of clock indices by name, to which the clocks
+                    declared by the template are added.
+        """
+        self.name = name
+        for c in analysis.declared_clocks(template.declaration):
+            clocks[name + "." + c] = len(clocks)
+        local = dict((c.split(".")[-1], i) for (c, i) in clocks.items() if c.startswith(name + "."))
+        self.clocks = dict(clocks, **local)
+        locations = list(template.locations)
+        index = dict((id(l), i) for (i, l) in enumerate(locations))
+        self.locations = [l.name.get_value() or l.id for l in locations]
+        self.initial = index[id(template.initlocation)]
+        self.committed = [bool(l.committed) for l in locations]
+        self.urgent = [bool(l.urgent) for l in locations]
+        self.invariants = [self.constraints(l.invariant.get_value()) for l in locations]
+        self.edges = [[] for l in locations]
+        self.all_edges = []
+        for (i, t) in enumerate(template.transitions):
+            e = Edge()
+            e.index = i
+            e.source = index[id(t.source)]
+            e.target = index[id(t.target)]
+            e.guard = self.constraints(t.guard.get_value())
+            e.resets = self.resets(t.assignment.get_value())
+            synch = (t.synchronisation.get_value() or "").strip()
+            e.channel = synch[:-1].strip() if synch else None
+            e.send = synch.endswith("!")
+            self.edges[e.source].append(e)
+            self.all_edges.append(e)
+
+    def clock(self, name, text):
+        if name not in self.clocks:
+            raise ValueError(self.name + ": unsupported expression " + text)
+        return self.clocks[name]
+
+    def constraints(self, text):
+        """
+        Returns:
+            List of (clock index, operator, constant) triples of a conjunction.
+        """
+        result = []
+        for atom in (text or "").split("&&"):
+            if not atom.strip() or atom.strip() == "true":
+                continue
+            match = CONSTRAINT.match(atom)
+            if not match:
+                raise ValueError(self.name + ": unsupported constraint " + atom.strip())
+            result.append((self.clock(match.group(1), atom.strip()), match.group(2), int(match.group(3))))
+        return result
+
+    def resets(self, text):
+        """
+        Returns:
+            List of (clock index, value) pairs of an assignment.
+        """
+        result = []
+        for atom in (text or "").split(","):
+            if not atom.strip():
+                continue
+            match = RESET.match(atom)
+            if not match:
+                raise ValueError(self.name + ": unsupported assignment " + atom.strip())
+            result.append((self.clock(match.group(1), atom.strip()), int(match.group(2))))
+        return result
+
+def restrict(interval, constraints, values):
+    """
+    Restricts an interval of delays to the delays after which the constraints hold.
+
+    Args:
+        interval: [low, low is strict, high, high is strict].
+        constraints: List of (clock index, operator, constant) triples.
+        values: Clock values before the delay, by clock index.
+    """
+    for (c, op, n) in constraints:
+        bound = n - values[c]
+        if op in ("<", "<=", "=="):
+            if bound < interval[2] - EPSILON or (abs(bound - interval[2]) <= EPSILON and op == "<"):
+                interval[2], interval[3] = bound, op == "<"
+        if op in (">", ">=", "=="):
+            if bound > interval[0] + EPSILON or (abs(bound - interval[0]) <= EPSILON and op == ">"):
+                interval[0], interval[1] = bound, op == ">"
+
+def holds(value, op, n):
+    return {"<": value < n, "<=": value <= n, "==": value == n, ">": value > n, ">=": value >= n}[op]
+
+def is_empty(interval):
+    if interval[0] > interval[2] + EPSILON:
+        return True
+    return abs(interval[0] - interval[2]) <= EPSILON and (interval[1] or interval[3])
+
+class Simulator(object):
+    """
+    Random simulator of a network of timed automata.
+    """
+    def __init__(self, nta):
+        """
+        Args:
+            nta: pyuppaal.NTA.
+        """
+        clocks = {}
+        for c in analysis.declared_clocks(nta.declaration):
+            clocks[c] = len(clocks)
+        self.processes = [Process(n, t, clocks) for (n, t) in analysis.instances(nta)]
+        self.clock_count = len(clocks)
+        self.horizon = max([n for p in self.processes for l in p.invariants + [e.guard for e in p.all_edges] for (c, op, n) in l] + [0]) + 1
+
+    def after(self, values, resets):
+        values = list(values)
+        for (c, n) in resets:
+            values[c] = n
+        return values
+
+    def actions(self, locations, values):
+        """
+        Finds the actions possible after some delay.
+
+        Returns:
+            List of (edges, interval) pairs, where edges are (process index, Edge) pairs.
+        """
+        window = [0.0, False, INFINITY, False]
+        committed = False
+        for (i, p) in enumerate(self.processes):
+            restrict(window, p.invariants[locations[i]], values)
+            committed = committed or p.committed[locations[i]]
+            if (p.committed[locations[i]] or p.urgent[locations[i]]) and window[2] > 0.0:
+                window[2], window[3] = 0.0, False
+        if is_empty(window):
+            return []
+        candidates = []
+        senders = {}
+        receivers = {}
+        for (i, p) in enumerate(self.processes):
+            for e in p.edges[locations[i]]:
+                if e.channel is None:
+                    if not committed or p.committed[locations[i]]:
+                        candidates.append([(i, e)])
+                else:
+                    (senders if e.send else receivers).setdefault(e.channel, []).append((i, e))
+        for a in senders.keys():
+            for (i, s) in senders[a]:
+                for (j, r) in receivers.get(a, []):
+                    if i != j and (not committed or self.processes[i].committed[locations[i]] or self.processes[j].committed[locations[j]]):
+                        candidates.append([(i, s), (j, r)])
+        result = []
+        for edges in candidates:
+            interval = list(window)
+            resets = []
+            for (i, e) in edges:
+                restrict(interval, e.guard, values)
+                resets += e.resets
+            reset = dict(resets)
+            for (i, e) in edges:
+                # Clocks reset by the action do not change with the delay.
+                invariant = self.processes[i].invariants[e.target]
+                restrict(interval, [x for x in invariant if x[0] not in reset], values)
+                for (c, op, n) in invariant:
+                    if c in reset and not holds(reset[c], op, n):
+                        interval[2] = -1.0
+            if not is_empty(interval):
+                result.append((edges, interval))
+        return result
+
+    def delay(self, rnd, interval):
+        """
+        Returns:
+            A random delay in the interval.
+        """
+        (low, high) = (interval[0], interval[2])
+        if high == INFINITY:
+            high = low + self.horizon
+        if high - low <= EPSILON:
+            return low
+        d = rnd.uniform(low, high)
+        while (interval[1] and d <= low) or (interval[3] and d >= high):
+            d = rnd.uniform(low, high)
+        return d
+
+    def run(self, rnd, depth, visited, fired):
+        """
+        Simulates a random run of at most depth actions.
+
+        Returns:
+            (number of actions, trace) where trace is None unless a deadlock is reached.
+        """
+        locations = [p.initial for p in self.processes]
+        values = [0.0] * self.clock_count
+        trace = []
+        for (i, l) in enumerate(locations):
+            visited[i].add(l)
+        for step in range(depth):
+            actions = self.actions(locations, values)
+            if not actions:
+                return (step, trace + [self.describe(locations, values) + " deadlock"])
+            (edges, interval) = rnd.choice(actions)
+            d = self.delay(rnd, interval)
+            values = [v + d for v in values]
+            for (i, e) in edges:
+                values = self.after(values, e.resets)
+                locations[i] = e.target
+                visited[i].add(e.target)
+                fired[i].add(e.index)
+            trace.append("delay %.2f, " % d + ", ".join([self.processes[i].name + ": " + self.processes[i].locations[e.source] + " -> " +
+                                                          self.processes[i].locations[e.target] for (i, e) in edges]))
+            del trace[:-20]
+        return (depth, None)
+
+    def describe(self, locations, values):
+        return "(" + ", ".join([p.name + "." + p.locations[locations[i]] for (i, p) in enumerate(self.processes)]) + ")"
+
+def simulate(nta, runs=1000, depth=100, seed=0):
+    """
+    Simulates random runs of a model.
+
+    Args:
+        nta: pyuppaal.NTA.
+        runs: Number of runs.
+        depth: Maximum number of actions of a run.
+        seed: Random seed.
+    Returns:
+        Dictionary with the number of runs, actions, and deadlocks, the trace
+        of the first deadlock, the locations never entered, and the transitions
+        never taken.
+    """
+    simulator = Simulator(nta)
+    rnd = random.Random(seed)
+    visited = [set() for p in simulator.processes]
+    fired = [set() for p in simulator.processes]
+    actions = 0
+    deadlocks = 0
+    first_deadlock = None
+    start = time.time()
+    for r in range(runs):
+        (n, trace) = simulator.run(rnd, depth, visited, fired)
+        actions += n
+        if trace is not None:
+            deadlocks += 1
+            first_deadlock = first_deadlock or trace
+    elapsed = max(time.time() - start, 1e-9)
+    return {
+        "runs": runs,
+        "actions": actions,
+        "seconds": elapsed,
+        "runs_per_second": runs / elapsed,
+        "deadlocks": deadlocks,
+        "first_deadlock": first_deadlock,
+        "never_entered": [p.name + "." + p.locations[l] for (i, p) in enumerate(simulator.processes)
+                          for l in range(len(p.locations)) if l not in visited[i]],
+        "never_taken": [p.name + ": " + p.locations[e.source] + " -> " + p.locations[e.target] for (i, p) in enumerate(simulator.processes)
+                        for e in p.all_edges if e.index not in fired[i]]
+    }
+
+def format_report(report):
+    """
+    Returns:
+        The report returned by simulate as text.
+    """
+    lines = ["runs:                   %d (%.0f runs/s, %d actions)" % (report["runs"], report["runs_per_second"], report["actions"]),
+             "deadlocks:              %d" % report["deadlocks"]]
+    if report["first_deadlock"]:
+        lines += ["first deadlock:"] + ["    " + step for step in report["first_deadlock"]]
+    if report["never_entered"]:
+        lines.append("never entered:          " + ", ".join(report["never_entered"]))
+    for t in report["never_taken"]:
+        lines.append("never taken:            " + t)
+    return "\n".join(lines)
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Simulates random runs of a UPPAAL model generated by ATAC")
+    argument_parser.add_argument("model", help="model file")
+    argument_parser.add_argument("--runs", type=int, default=1000, help="number of runs (default: 1000)")
+    argument_parser.add_argument("--depth", type=int, default=100, help="maximum number of actions of a run (default: 100)")
+    argument_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = argument_parser.parse_args()
+    f = open(args.model)
+    nta = pyuppaal.NTA.from_xml(f)
+    f.close()
+    print(format_report(simulate(nta, args.runs, args.depth, args.seed)))
+
+if __name__ == "__main__":
+    main()